@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 GRAPHENE = {"SCHEMA": "event.schema.schema"}
 
 MIDDLEWARE = [
+    "core.middleware.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -149,7 +150,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 CACHES = {
     "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
+        "BACKEND": "core.cache.backends.InstrumentedRedisCache",
         "LOCATION": "redis://host.docker.internal:6379/1",
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
@@ -160,10 +161,33 @@ CACHES = {
 
 GRAPHQL_CACHING = True
 
+# Answer fresh cache hits of the event and GraphQL views from native async
+# views (no worker thread under ASGI); misses always run the sync views.
+# Only enable it when serving with ASGI: WSGI requests skip the async path.
+ASYNC_CACHE_HITS = bool(os.getenv("ASYNC_CACHE_HITS"))
+
+# Static cost budget per GraphQL operation, checked at validation time.
+GRAPHQL_COST = {
+    "MAX_COST": 5000,
+    "MAX_DEPTH": 8,
+    "LIST_SIZE": 100,  # assumed length of lists without first/last
+    "FIELD_COSTS": {},  # "Type.field": weight, objects default to 1
+    "LIST_SIZES": {  # "Type.field": assumed length
+        "EventType.relatedLinks": 10,
+    },
+}
+
+# Automatic persisted queries: how long a registered document is kept and
+# the max-age sent on successful GET requests by hash.
+GRAPHQL_APQ = {
+    "TTL": 60 * 60 * 24 * 7,  # 7 days
+    "MAX_AGE": 60,
+}
+
 # settings.py
 CACHES = {
     "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
+        "BACKEND": "core.cache.backends.InstrumentedRedisCache",
         "LOCATION": "redis://127.0.0.1:6379/0",
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
@@ -176,8 +200,52 @@ CACHES = {
     }
 }
 
-# Cache timeouts in seconds
+# Per-worker request and cache metrics, scraped from /metrics by Prometheus.
+METRICS_ENABLED = True
+
+# Cache timeouts in seconds. SOFT is when an entry is refreshed (callers keep
+# getting the stale value meanwhile), HARD is when it leaves Redis.
 CACHE_TTL = {
-    "EVENT_LIST": 60 * 5,  # 5 minutes for lists
-    "EVENT_DETAIL": 60 * 30,  # 30 minutes for details
+    "EVENT_LIST": {"SOFT": 60 * 5, "HARD": 60 * 15},  # 5 minutes for lists
+    "EVENT_DETAIL": {"SOFT": 60 * 30, "HARD": 60 * 60},  # 30 minutes for details
+    "GRAPHQL": {"SOFT": 60 * 5, "HARD": 60 * 15},  # query operation results
+}
+
+# Encoding of cached view and GraphQL entries per key namespace, picked from
+# `manage.py cache_codecs` (decode plus transfer time per hit). SERIALIZER is
+# pickle, orjson or msgpack (JSON types only, anything else is pickled) and
+# COMPRESSOR None, zlib or lz4, applied from MIN_SIZE bytes. Namespaces not
+# listed keep the backend's pickle; GraphQL results measured faster that way.
+CACHE_CODECS = {
+    "event_list": {"SERIALIZER": "pickle", "COMPRESSOR": "zlib", "MIN_SIZE": 1024},
+    "event_detail": {"SERIALIZER": "orjson", "COMPRESSOR": "zlib", "MIN_SIZE": 1024},
+}
+
+# Detail views with cache_refresh_on_write recompute their entries on a
+# background thread after a write instead of deleting them, so readers never
+# miss; until the refresh lands (milliseconds) they get the previous body.
+CACHE_REFRESH_ON_WRITE = {
+    "ENABLED": bool(os.getenv("CACHE_REFRESH_ON_WRITE")),
+    "WORKERS": 2,  # refresh threads per worker process
+}
+
+# `manage.py warm_cache` precomputes lists, upcoming details and QUERIES
+# (GraphQL POST bodies). With RECORD, a SAMPLE_RATE share of cached reads is
+# counted in a Redis sorted set under KEY, trimmed to the MAX_KEYS hottest,
+# and replayed with `warm_cache --recorded N`.
+WARM_CACHE = {
+    "RECORD": bool(os.getenv("WARM_CACHE_RECORD")),
+    "SAMPLE_RATE": 0.01,
+    "KEY": "cache:hot",
+    "MAX_KEYS": 1000,
+    "QUERIES": [],
+}
+
+# Optional in-process LRU in front of Redis for views with cache_local = True.
+# Writes evict local copies on every worker through a Redis pub/sub channel.
+LOCAL_CACHE = {
+    "ENABLED": bool(os.getenv("LOCAL_CACHE")),
+    "MAX_SIZE": 1024,  # entries per worker
+    "TTL": 5,  # seconds, bounds staleness if an eviction message is lost
+    "CHANNEL": "cache:invalidate",
 }
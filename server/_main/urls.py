@@ -1,7 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import metrics
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("event.urls")),
+    path("metrics", metrics, name="metrics"),
 ]
@@ -0,0 +1,210 @@
+# core/benchmarks.py
+import asyncio
+import platform
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import override_settings
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+BENCHMARK_KEY_PREFIX = "bench"
+
+
+def summarize(latencies, elapsed):
+    """Throughput and latency percentiles (ms) of one scenario"""
+    ordered = sorted(latencies)
+
+    def percentile(fraction):
+        index = min(len(ordered) - 1, int(fraction * len(ordered)))
+        return round(ordered[index] * 1000, 3)
+
+    return {
+        "requests": len(ordered),
+        "rps": round(len(ordered) / elapsed, 1) if elapsed else None,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def run_concurrently(send, total, concurrency):
+    """Await ``send()`` ``total`` times, at most ``concurrency`` at once"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await send()
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                raise RuntimeError(f"Benchmark request failed: {response.status_code}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_sequentially(send, total, before=None):
+    """Call ``send()`` ``total`` times, timing only the calls themselves
+
+    ``before`` runs untimed ahead of each call, e.g. to empty the cache.
+    One request at a time keeps runs comparable between commits.
+    """
+    latencies = []
+    for _ in range(total):
+        if before is not None:
+            before()
+        started = time.perf_counter()
+        response = send()
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            raise RuntimeError(f"Benchmark request failed: {response.status_code}")
+    return summarize(latencies, sum(latencies))
+
+
+def seed_events(count, links=0):
+    """Bulk insert ``count`` events with ``links`` links each
+
+    Names and dates are fixed, so every run reads the same rows.
+    """
+    from event.models import Event, Link, SocialNet
+
+    start = datetime(2030, 1, 1, tzinfo=timezone.utc)
+    events = Event.objects.bulk_create(
+        Event(
+            name=f"Event {i}",
+            description="Benchmark",
+            start_date=start + timedelta(hours=i),
+            end_date=start + timedelta(hours=i + 2),
+        )
+        for i in range(count)
+    )
+    networks = list(SocialNet.values)
+    Link.objects.bulk_create(
+        Link(
+            event=event,
+            type=networks[j % len(networks)],
+            link=f"https://example.com/{i}/{j}",
+        )
+        for i, event in enumerate(events)
+        for j in range(links)
+    )
+    return events
+
+
+def git_revision():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            cwd=settings.BASE_DIR,
+        )
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def environment_info(**parameters):
+    """What a result was measured on, stored next to it"""
+    return {
+        "revision": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "cache": settings.CACHES["default"]["BACKEND"],
+        **parameters,
+    }
+
+
+def compare_results(results, baseline):
+    """Ratio of each scenario's numbers to a baseline run (new / old)
+
+    Above 1 is slower for latencies and faster for ``rps``.
+    """
+    comparison = {}
+    for name, current in results.items():
+        if (previous := baseline.get(name)) is None:
+            continue
+        comparison[name] = {
+            metric: round(current[metric] / previous[metric], 3)
+            for metric in ("rps", "p50_ms", "p99_ms")
+            if current.get(metric) and previous.get(metric)
+        }
+    return comparison
+
+
+def measure_codec(codec, values, rounds=20):
+    """Encoded size and mean encode/decode time (µs) of ``values``"""
+    payloads = [codec.dumps(value) for value in values]
+    for payload in payloads:
+        codec.loads(payload)  # warm up before timing
+    timings = {}
+    for name, function, inputs in (
+        ("dumps_us", codec.dumps, values),
+        ("loads_us", codec.loads, payloads),
+    ):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for item in inputs:
+                function(item)
+        elapsed = time.perf_counter() - started
+        timings[name] = round(elapsed / (rounds * len(inputs)) * 1e6, 2)
+    return {"bytes": sum(len(payload) for payload in payloads), **timings}
+
+
+def benchmark_caches(locmem=False):
+    """CACHES for a benchmark: in process, or the configured ones namespaced
+
+    The configured caches get ``BENCHMARK_KEY_PREFIX`` added to their key
+    prefix, so ``clear_cache`` never touches the application's keys in a
+    shared Redis database.
+    """
+    if locmem:
+        return LOCMEM_CACHES
+    return {
+        alias: {
+            **config,
+            "KEY_PREFIX": ":".join(
+                filter(None, (config.get("KEY_PREFIX"), BENCHMARK_KEY_PREFIX))
+            ),
+        }
+        for alias, config in settings.CACHES.items()
+    }
+
+
+def clear_cache():
+    """Delete the benchmark's cache entries, and only those"""
+    if hasattr(cache, "delete_pattern"):  # django-redis: the prefixed keys
+        cache.delete_pattern("*")
+    else:
+        cache.clear()
+
+
+@contextmanager
+def benchmark_environment(locmem=False):
+    """Throwaway test database, and a cache of its own
+
+    Without Redis, ``locmem`` keeps every cache call in process; note that
+    Django then runs async cache reads in a thread. With Redis, the keys
+    are namespaced by ``benchmark_caches`` and deleted afterwards.
+    """
+    caches = override_settings(CACHES=benchmark_caches(locmem))
+    caches.enable()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        clear_cache()
+        caches.disable()
@@ -0,0 +1,133 @@
+# core/cache/aio.py
+import asyncio
+import time
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.handlers.asgi import ASGIRequest
+
+from core.metrics import record_cache_call, record_lookup
+
+from .local import MISSING
+from .stampede import CacheEntry, should_refresh
+
+_clients = weakref.WeakKeyDictionary()  # event loop -> redis.asyncio client
+
+
+def async_cache_hits_enabled():
+    return getattr(settings, "ASYNC_CACHE_HITS", False)
+
+
+def native_client():
+    """redis.asyncio client for the default django-redis cache, else None
+
+    Other backends (locmem in tests) fall back to Django's ``aget``, which
+    runs the sync call in a thread. Clients are bound to an event loop, so
+    one is kept per loop.
+    """
+    try:
+        from django_redis.cache import RedisCache
+    except ImportError:
+        return None
+    if not isinstance(caches[DEFAULT_CACHE_ALIAS], RedisCache):  # not the proxy
+        return None
+
+    loop = asyncio.get_running_loop()
+    if (client := _clients.get(loop)) is None:
+        client = _clients[loop] = _connect(settings.CACHES[DEFAULT_CACHE_ALIAS])
+    return client
+
+
+def _connect(config):
+    """redis.asyncio client with the pool settings django-redis would use"""
+    import redis.asyncio
+    from django_redis.pool import get_connection_factory
+
+    location = config["LOCATION"]
+    if isinstance(location, (list, tuple)):
+        location = location[0]  # reads may go to the primary
+    options = config.get("OPTIONS", {})
+    params = get_connection_factory(options=options).make_connection_params(location)
+    del params["parser_class"]  # a sync parser, redis.asyncio picks its own
+    pool = redis.asyncio.ConnectionPool.from_url(
+        **params, **options.get("CONNECTION_POOL_KWARGS", {})
+    )
+    return redis.asyncio.Redis(
+        connection_pool=pool, **options.get("REDIS_CLIENT_KWARGS", {})
+    )
+
+
+async def aget(key, default=None):
+    if (client := native_client()) is None:
+        return await cache.aget(key, default)
+    started = time.perf_counter()
+    value = await client.get(cache.client.make_key(key))
+    record_cache_call("get", key, time.perf_counter() - started)
+    return default if value is None else cache.client.decode(value)
+
+
+async def aget_many(keys):
+    if (client := native_client()) is None:
+        return await cache.aget_many(keys)
+    started = time.perf_counter()
+    values = await client.mget([cache.client.make_key(key) for key in keys])
+    record_cache_call("get_many", keys, time.perf_counter() - started)
+    return {
+        key: cache.client.decode(value)
+        for key, value in zip(keys, values)
+        if value is not None
+    }
+
+
+async def aget_fresh(key, beta=1.0):
+    """Value of a ``get_or_compute`` entry that needs no refresh, or MISSING
+
+    Anything else (cold, stale, due for early refresh) is left to the sync
+    ``get_or_compute`` so locking and recomputation stay in one place, and
+    counted there as well.
+    """
+    entry = await aget(key)
+    if isinstance(entry, CacheEntry) and not should_refresh(entry, beta):
+        record_lookup(key, "hit")
+        return entry.load()
+    return MISSING
+
+
+class AsyncHitMixin:
+    """Serve cache hits from a native async view, the rest from the sync one
+
+    With ``ASYNC_CACHE_HITS`` on, ``as_view`` returns a coroutine function.
+    Under ASGI a hit then costs no worker thread: ``aget_hit`` awaits the
+    cache and builds the response, and only when it returns None does the
+    request go to the regular view, run in a thread by ``sync_to_async``.
+    Requests not served by ASGI go straight to the regular view: under WSGI
+    each one would run on a new event loop, with a new Redis connection.
+    With the setting off, ``as_view`` returns the regular view itself, so
+    WSGI deployments pay no thread hops. Put it first in the bases; a later
+    base provides ``aget_hit``.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        sync_view = super().as_view(**initkwargs)
+        if not async_cache_hits_enabled():
+            return sync_view
+        run_sync = sync_to_async(sync_view)
+
+        async def view(request, *args, **kwargs):
+            if async_cache_hits_enabled() and isinstance(request, ASGIRequest):
+                self = cls(**initkwargs)
+                self.setup(request, *args, **kwargs)
+                response = await self.aget_hit(request, *args, **kwargs)
+                if response is not None:
+                    return response
+            return await run_sync(request, *args, **kwargs)
+
+        view.view_class = cls
+        view.view_initkwargs = initkwargs
+        view.cls = getattr(sync_view, "cls", cls)
+        view.initkwargs = initkwargs
+        view.csrf_exempt = getattr(sync_view, "csrf_exempt", False)
+        return view
@@ -0,0 +1,58 @@
+# core/cache/backends.py
+import functools
+import time
+
+from django.core.cache.backends.locmem import LocMemCache
+from django_redis.cache import RedisCache
+
+from core.metrics import record_cache_call
+
+
+def instrumented(*operations):
+    """Time the given backend methods into ``cache_operation_seconds``
+
+    Also charges the time to the request being served. Only list methods
+    the backend implements itself: BaseCache's ``get_many`` and friends
+    call ``get`` in a loop and would be counted twice.
+    """
+
+    def decorate(cls):
+        for operation in operations:
+            setattr(cls, operation, _timed(operation, getattr(cls, operation)))
+        return cls
+
+    return decorate
+
+
+def _timed(operation, method):
+    @functools.wraps(method)
+    def timed(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            key = args[0] if args else next(iter(kwargs.values()), "")
+            record_cache_call(operation, key, time.perf_counter() - started)
+
+    return timed
+
+
+@instrumented(
+    "get",
+    "set",
+    "add",
+    "delete",
+    "get_many",
+    "set_many",
+    "delete_many",
+    "has_key",
+    "incr",
+    "touch",
+)
+class InstrumentedRedisCache(RedisCache):
+    """django-redis cache reporting its calls to ``core.metrics``"""
+
+
+@instrumented("get", "set", "add", "delete", "has_key", "incr", "touch")
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache reporting its calls to ``core.metrics``"""
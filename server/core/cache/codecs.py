@@ -0,0 +1,141 @@
+# core/cache/codecs.py
+import pickle
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from core.metrics import CACHE_ENTRY_BYTES
+
+try:
+    import orjson
+except ImportError:  # optional, see requirements.txt
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+
+def _pickle_dumps(value):
+    return pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _orjson_dumps(value):
+    # Dataclasses and datetimes would come back as dicts and strings: let
+    # them fail over to pickle instead.
+    return orjson.dumps(
+        value,
+        option=orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME,
+    )
+
+
+def _msgpack_dumps(value):
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _msgpack_loads(data):
+    return msgpack.unpackb(data, raw=False)
+
+
+def _zlib_compress(data):
+    return zlib.compress(data, 1)  # about the ratio of level 6 on JSON, twice as fast
+
+
+# name -> (tag, dumps, loads). The tag leads every payload, so any codec
+# reads what any other wrote and settings can change under live entries.
+SERIALIZERS = {"pickle": (b"p", _pickle_dumps, pickle.loads)}
+if orjson is not None:
+    SERIALIZERS["orjson"] = (b"j", _orjson_dumps, orjson.loads)
+if msgpack is not None:
+    SERIALIZERS["msgpack"] = (b"m", _msgpack_dumps, _msgpack_loads)
+
+COMPRESSORS = {
+    None: (b"-", None, None),
+    "zlib": (b"z", _zlib_compress, zlib.decompress),
+}
+if lz4 is not None:
+    COMPRESSORS["lz4"] = (b"4", lz4.frame.compress, lz4.frame.decompress)
+
+_loaders = {tag: loads for tag, _, loads in SERIALIZERS.values()}
+_decompressors = {tag: decompress for tag, _, decompress in COMPRESSORS.values()}
+
+
+class Codec:
+    """Serializer plus optional compressor for cached values
+
+    ``dumps`` returns bytes led by a two-byte tag naming both. Values the
+    serializer cannot represent (JSON serializers and anything beyond
+    JSON types) are pickled instead, and payloads under ``min_size`` bytes
+    are not compressed.
+    """
+
+    def __init__(self, serializer="pickle", compressor=None, min_size=1024):
+        if serializer not in SERIALIZERS:
+            raise ImproperlyConfigured(f"Cache serializer {serializer!r} unavailable")
+        if compressor not in COMPRESSORS:
+            raise ImproperlyConfigured(f"Cache compressor {compressor!r} unavailable")
+        self.serializer = serializer
+        self.compressor = compressor
+        self.min_size = min_size
+
+    @property
+    def name(self):
+        return "+".join(filter(None, (self.serializer, self.compressor)))
+
+    def dumps(self, value):
+        tag, dumps, _ = SERIALIZERS[self.serializer]
+        try:
+            data = dumps(value)
+        except TypeError:
+            tag, dumps, _ = SERIALIZERS["pickle"]
+            data = dumps(value)
+        compressed, compress, _ = COMPRESSORS[self.compressor]
+        if compress is not None and len(data) >= self.min_size:
+            return tag + compressed + compress(data)
+        return tag + b"-" + data
+
+    @staticmethod
+    def loads(data):
+        serializer, compressor = data[:1], data[1:2]
+        data = memoryview(data)[2:]  # no copy of large payloads
+        if (decompress := _decompressors[compressor]) is not None:
+            data = decompress(data)
+        return _loaders[serializer](data)
+
+
+def available_codecs(min_size=1024):
+    """Every serializer and compressor combination installed here"""
+    return [
+        Codec(serializer, compressor, min_size)
+        for serializer in SERIALIZERS
+        for compressor in COMPRESSORS
+    ]
+
+
+def namespace_codec(namespace):
+    """Codec configured in ``CACHE_CODECS`` for a key namespace, or None
+
+    Namespaces without an entry keep the cache backend's own serializer.
+    """
+    config = getattr(settings, "CACHE_CODECS", {}).get(namespace)
+    if config is None:
+        return None
+    return Codec(
+        config.get("SERIALIZER", "pickle"),
+        config.get("COMPRESSOR"),
+        config.get("MIN_SIZE", 1024),
+    )
+
+
+def encode(namespace, value):
+    """``(payload, encoded)`` for storing ``value`` under ``namespace``"""
+    if (codec := namespace_codec(namespace)) is None:
+        return value, False
+    data = codec.dumps(value)
+    CACHE_ENTRY_BYTES.observe(len(data), namespace)
+    return data, True
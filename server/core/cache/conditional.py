@@ -0,0 +1,142 @@
+# core/cache/conditional.py
+import time
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .aio import aget
+from .keys import stable_digest
+
+
+def modified_key(model_name, pk=None):
+    if pk is None:
+        return f"{model_name}_modified"
+    return f"{model_name}_modified:{pk}"
+
+
+def record_writes(model_name, saved=(), deleted=(), field="updated_at"):
+    """Move the list and detail validators forward after writes to rows"""
+    if deleted:
+        cache.delete_many(
+            [modified_key(model_name, instance.pk) for instance in deleted]
+        )
+    updated = {
+        modified_key(model_name, instance.pk): updated_at.timestamp()
+        for instance in saved
+        if (updated_at := getattr(instance, field, None)) is not None
+    }
+    updated[modified_key(model_name)] = time.time()
+    cache.set_many(updated, timeout=None)
+
+
+class ConditionalGetMixin:
+    """Answers If-None-Match/If-Modified-Since with 304 from cached validators
+
+    ``get_validators`` must only touch the cache, so an unchanged resource
+    costs neither a database query nor serialization.
+    """
+
+    def get_validators(self):
+        """Return ``(etag, last_modified_timestamp)``, either may be None"""
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        last_modified = int(last_modified) if last_modified is not None else None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            if etag is None and last_modified is None:
+                # Validators are filled while the response is computed
+                etag, last_modified = self.get_validators()
+                last_modified = int(last_modified) if last_modified else None
+        return self.set_validators(response, etag, last_modified)
+
+    def set_validators(self, response, etag, last_modified):
+        if etag is not None:
+            response["ETag"] = etag
+        if last_modified is not None:
+            response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    async def aget_validators(self):
+        """Async ``get_validators``; (None, None) leaves it to the sync view"""
+        return None, None
+
+    async def ahandle_hit(self):
+        etag, last_modified = await self.aget_validators()
+        if etag is None and last_modified is None:
+            return None
+        last_modified = int(last_modified) if last_modified is not None else None
+        response = get_conditional_response(
+            self.request, etag=etag, last_modified=last_modified
+        )
+        if response is None and (response := await super().ahandle_hit()) is None:
+            return None
+        return self.set_validators(response, etag, last_modified)
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """Validators from the list cache key, which embeds the model generation"""
+
+    def get_validators(self):
+        model_name = self.queryset.model.__name__.lower()
+        last_modified = cache.get(modified_key(model_name))
+        if last_modified is None:
+            # Cold validator: claiming "now" is safe, it only makes
+            # earlier If-Modified-Since values miss.
+            last_modified = time.time()
+            cache.add(modified_key(model_name), last_modified, timeout=None)
+        return quote_etag(stable_digest(self.get_cache_key())), last_modified
+
+    async def aget_validators(self):
+        model_name = self.queryset.model.__name__.lower()
+        if (last_modified := await aget(modified_key(model_name))) is None:
+            return None, None
+        etag = quote_etag(stable_digest(await self.aget_cache_key()))
+        return etag, last_modified
+
+
+class ConditionalDetailMixin(ConditionalGetMixin):
+    """Validators from the object's ``last_modified_field``"""
+
+    last_modified_field = "updated_at"
+
+    def get_etag(self, model_name, last_modified):
+        """Strong ETag, distinct per negotiated format (JSON, browsable API)"""
+        renderer = getattr(self.request, "accepted_renderer", None)
+        variant = renderer.format if renderer is not None else None
+        return quote_etag(
+            stable_digest(model_name, self.kwargs["pk"], last_modified, variant)
+        )
+
+    def get_validators(self):
+        model_name = self.queryset.model.__name__.lower()
+        last_modified = cache.get(modified_key(model_name, self.kwargs["pk"]))
+        if last_modified is None:
+            return None, None
+        return self.get_etag(model_name, last_modified), last_modified
+
+    async def aget_validators(self):
+        model_name = self.queryset.model.__name__.lower()
+        last_modified = await aget(modified_key(model_name, self.kwargs["pk"]))
+        if last_modified is None:
+            return None, None
+        return self.get_etag(model_name, last_modified), last_modified
+
+    def get_object(self):
+        instance = super().get_object()
+        updated_at = getattr(instance, self.last_modified_field, None)
+        if updated_at is not None:
+            model_name = self.queryset.model.__name__.lower()
+            cache.add(
+                modified_key(model_name, instance.pk),
+                updated_at.timestamp(),
+                timeout=None,
+            )
+        return instance
@@ -0,0 +1,142 @@
+# core/cache/invalidation.py
+import copy
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import router, transaction
+
+from core.metrics import CACHE_INVALIDATED_ROWS
+
+from .conditional import record_writes
+from .keys import detail_cache_key
+from .local import invalidation_bus, local_cache_enabled
+from .partitions import written_list_tags
+from .refresh import refreshing_view, schedule_detail_refresh
+from .tags import invalidate_tags, model_tag
+
+_state = threading.local()
+
+
+def invalidate_instances(model, saved=(), deleted=(), tags=()):
+    """Evict everything cached for these rows of ``model`` in one pass
+
+    Detail keys go in a single DELETE (and one bus message), the model tag
+    and the list partition ``tags`` are bumped once and the conditional GET
+    validators move forward once, however many rows were written. With
+    ``CACHE_REFRESH_ON_WRITE``, detail entries of saved rows are recomputed
+    in the background instead, so they never miss; their validators move
+    once the new entry is stored.
+    """
+    model_name = model.__name__.lower()
+    detail_keys = [
+        detail_cache_key(model_name, instance.pk) for instance in [*saved, *deleted]
+    ]
+    if not detail_keys:
+        return
+    CACHE_INVALIDATED_ROWS.inc(model._meta.label_lower, amount=len(detail_keys))
+    view = refreshing_view(model)
+    evicted = detail_keys if view is None else detail_keys[len(saved) :]
+    if evicted:
+        cache.delete_many(evicted)
+    if local_cache_enabled():
+        invalidation_bus.publish(detail_keys)
+    invalidate_tags([model_tag(model), *sorted(tags)])
+    if view is None:
+        record_writes(model_name, saved, deleted)
+        return
+    record_writes(model_name, (), deleted)
+    if saved:
+        schedule_detail_refresh(view, [instance.pk for instance in saved])
+
+
+class InvalidationBatch:
+    """Writes collected while a batch is open, last write per row wins"""
+
+    def __init__(self):
+        self.writes = defaultdict(dict)  # model -> pk -> (instance, deleted)
+        self.tags = defaultdict(set)  # model -> list partition tags
+
+    def add(self, model, instances, deleted=False, tags=()):
+        for instance in instances:
+            if deleted:
+                instance = copy.copy(instance)  # Django clears the pk after
+            self.writes[model][instance.pk] = (instance, deleted)
+        self.tags[model].update(tags)
+
+    def flush(self):
+        writes, self.writes = self.writes, defaultdict(dict)
+        tags, self.tags = self.tags, defaultdict(set)
+        for model, rows in writes.items():
+            saved = [instance for instance, deleted in rows.values() if not deleted]
+            removed = [instance for instance, deleted in rows.values() if deleted]
+            invalidate_instances(model, saved, removed, tags[model])
+
+
+def _batches():
+    if not hasattr(_state, "transactions"):
+        _state.transactions = {}  # db alias -> batch awaiting the commit
+    return _state.transactions
+
+
+def _awaits_commit(connection, callback):
+    """Whether ``callback`` is still queued by ``on_commit`` on ``connection``
+
+    Django drops the callbacks of a transaction or savepoint that rolls
+    back, and empties the queue before running it on commit.
+    """
+    return any(queued == callback for _, queued, _ in connection.run_on_commit)
+
+
+@contextmanager
+def invalidation_batch():
+    """Defer invalidations of the current thread and flush them once
+
+    The flush happens when the block exits, or after the commit when the
+    block runs inside a transaction. Nested batches join the outermost one.
+    """
+    if getattr(_state, "batch", None) is not None:
+        yield _state.batch
+        return
+    _state.batch = batch = InvalidationBatch()
+    try:
+        yield batch
+    finally:
+        _state.batch = None
+        transaction.on_commit(batch.flush)
+
+
+def queue_invalidation(model, instances, deleted=False, created=False):
+    """Invalidate after the surrounding transaction commits, coalesced
+
+    Writes inside ``atomic()`` join one batch per database that is flushed
+    once, deduplicated, by ``on_commit``, so readers cannot refill the cache
+    with uncommitted rows and a thousand saves cost one flush. The flush is
+    registered once, by the write that opens the batch. If the transaction
+    (or the savepoint that write ran in) rolls back, the flush is dropped
+    and the next write opens a new batch, so its rows are never flushed.
+    In autocommit mode the flush is immediate. The list partitions are
+    found right away, while the rows still know the values they were
+    loaded with.
+    """
+    tags = written_list_tags(model, instances, created)
+    if (batch := getattr(_state, "batch", None)) is not None:
+        batch.add(model, instances, deleted, tags)
+        return
+
+    using = router.db_for_write(model)
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        if deleted:
+            invalidate_instances(model, deleted=instances, tags=tags)
+        else:
+            invalidate_instances(model, saved=instances, tags=tags)
+        return
+
+    batches = _batches()
+    batch = batches.get(using)
+    if batch is None or not _awaits_commit(connection, batch.flush):
+        batch = batches[using] = InvalidationBatch()
+        transaction.on_commit(batch.flush, using=using)
+    batch.add(model, instances, deleted, tags)
@@ -0,0 +1,94 @@
+# core/cache/keys.py
+import hashlib
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+
+from .aio import aget_many
+
+
+def generation_key(namespace):
+    return f"{namespace}:gen"
+
+
+def get_generations(namespaces):
+    """Current generation of each namespace in one round-trip, seeding new ones"""
+    keys = {generation_key(namespace): namespace for namespace in namespaces}
+    found = cache.get_many(list(keys))
+    for key in keys.keys() - found.keys():
+        # Seed from the clock so an evicted counter never restarts at a
+        # value that still has live entries under it.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        found[key] = cache.get(key)
+    return {keys[key]: generation for key, generation in found.items()}
+
+
+async def aget_generations(namespaces):
+    """``get_generations`` for async callers, seeding goes through a thread"""
+    keys = {generation_key(namespace): namespace for namespace in namespaces}
+    found = await aget_many(list(keys))
+    if len(found) < len(keys):
+        return await sync_to_async(get_generations)(namespaces)
+    return {keys[key]: generation for key, generation in found.items()}
+
+
+def get_generation(namespace):
+    """Current generation of a cache namespace, seeding it on first use"""
+    return get_generations([namespace])[namespace]
+
+
+def bump_generation(namespace):
+    """Invalidate every key of a namespace with a single atomic INCR"""
+    key = generation_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Counter missing (never read or evicted): seeding it moves the
+        # namespace to a fresh generation as well.
+        get_generation(namespace)
+        return cache.incr(key)
+
+
+def normalize_params(params, ignore=(), defaults=None):
+    """Canonical, order-independent form of request query params
+
+    Multi-value params keep every value, blank values are dropped and a
+    param equal to its declared default is treated as absent, so
+    equivalent requests always normalize to the same list.
+    """
+    defaults = defaults or {}
+    normalized = []
+    for name in sorted(params.keys()):
+        if name in ignore:
+            continue
+        if hasattr(params, "getlist"):
+            values = params.getlist(name)
+        else:
+            values = params[name]
+            values = values if isinstance(values, (list, tuple)) else [values]
+        values = sorted(str(value) for value in values if value not in ("", None))
+        if not values:
+            continue
+        if name in defaults and values == [str(defaults[name])]:
+            continue
+        normalized.append([name, values])
+    return normalized
+
+
+def stable_digest(*parts):
+    """Digest that is identical across processes, unlike the salted hash()"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def build_cache_key(namespace, *parts, params=None, ignore=(), defaults=None):
+    """Build ``<namespace>:<digest>`` from positional parts and query params"""
+    if params is not None:
+        parts += (normalize_params(params, ignore=ignore, defaults=defaults),)
+    return f"{namespace}:{stable_digest(*parts)}"
+
+
+def detail_cache_key(model_name, pk):
+    return build_cache_key(f"{model_name}_detail", pk)
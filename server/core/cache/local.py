@@ -0,0 +1,145 @@
+# core/cache/local.py
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from core.metrics import CallbackMetric, registry
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+
+def local_cache_settings():
+    return {
+        "ENABLED": False,
+        "MAX_SIZE": 1024,
+        "TTL": 5,
+        "CHANNEL": "cache:invalidate",
+        **getattr(settings, "LOCAL_CACHE", {}),
+    }
+
+
+def local_cache_enabled():
+    return bool(local_cache_settings()["ENABLED"])
+
+
+class LocalLRUCache:
+    """Bounded, thread-safe in-process LRU with a per-entry TTL"""
+
+    def __init__(self, max_size=1024, ttl=5):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class InvalidationBus:
+    """Evicts keys from every worker's local cache over Redis pub/sub
+
+    Each process runs one daemon thread subscribed to ``channel``. If the
+    subscription drops, the local cache is cleared because messages may
+    have been missed; the entry TTL bounds staleness in the meantime.
+    """
+
+    def __init__(self, local, channel, client_factory, reconnect_delay=1.0):
+        self.local = local
+        self.channel = channel
+        self.client_factory = client_factory
+        self.reconnect_delay = reconnect_delay
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def publish(self, keys):
+        keys = list(keys)
+        self.local.delete_many(keys)
+        self.client_factory().publish(self.channel, json.dumps(keys))
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._listen, name="cache-invalidation", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _listen(self):
+        while not self._stopped.is_set():
+            try:
+                pubsub = self.client_factory().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                while not self._stopped.is_set():
+                    message = pubsub.get_message(timeout=self.reconnect_delay)
+                    if message and message["type"] == "message":
+                        self.local.delete_many(json.loads(message["data"]))
+                pubsub.close()
+            except Exception:
+                logger.exception("Cache invalidation subscription failed")
+                self.local.clear()
+                self._stopped.wait(self.reconnect_delay)
+
+
+def redis_client():
+    """Raw redis-py client of the default django-redis cache"""
+    from django_redis import get_redis_connection
+
+    return get_redis_connection("default")
+
+
+_config = local_cache_settings()
+local_cache = LocalLRUCache(max_size=_config["MAX_SIZE"], ttl=_config["TTL"])
+invalidation_bus = InvalidationBus(local_cache, _config["CHANNEL"], redis_client)
+
+registry.register(
+    CallbackMetric(
+        "cache_local_entries",
+        "Entries held in this worker's in-process LRU.",
+        lambda: {(): len(local_cache)},
+    )
+)
@@ -1,50 +1,285 @@
 from django.core.cache import cache
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from core.metrics import record_lookup
 
-class CacheListMixin:
+from .aio import aget_fresh
+from .conditional import modified_key, record_writes
+from .invalidation import queue_invalidation
+from .keys import detail_cache_key
+from .local import MISSING, invalidation_bus, local_cache, local_cache_enabled
+from .partitions import partition_fields
+from .rendered import RenderedPayload
+from .refresh import register_detail_refresh
+from .stampede import get_or_compute, refresh, resolve_ttl
+from .tags import alist_cache_key, list_cache_key
+from .warming import arecord_request, record_request
+
+
+class StampedeProtectionMixin:
+    """Shared single-flight/stale-while-revalidate options for cached views"""
+
+    cache_timeout = None
+    cache_ttl_setting = None  # CACHE_TTL entry, defaults to <MODEL>_<KIND>
+    cache_lock_timeout = 10  # seconds a recomputation may hold the lock
+    cache_lock_wait = 2.0  # seconds a cold miss waits for the lock holder
+    cache_refresh_beta = 1.0  # early probabilistic refresh, 0 disables it
+    cache_local = False  # keep hits in the in-process LRU when LOCAL_CACHE is on
+
+    def get_cache_ttl(self, kind):
+        name = self.cache_ttl_setting
+        if name is None:
+            name = f"{self.queryset.model.__name__.upper()}_{kind}"
+        return resolve_ttl(name, self.cache_timeout)
+
+    def get_local(self, cache_key):
+        """Value from the in-process LRU, or MISSING"""
+        invalidation_bus.start()
+        value = local_cache.get(cache_key)
+        record_lookup(cache_key, "miss" if value is MISSING else "hit", "local")
+        return value
+
+    def get_cached(self, cache_key, kind, compute):
+        record_request(self.request)
+        use_local = self.cache_local and local_cache_enabled()
+        if use_local and (value := self.get_local(cache_key)) is not MISSING:
+            return value
+
+        soft_ttl, hard_ttl = self.get_cache_ttl(kind)
+        value = get_or_compute(
+            cache_key,
+            compute,
+            soft_ttl=soft_ttl,
+            hard_ttl=hard_ttl,
+            lock_timeout=self.cache_lock_timeout,
+            lock_wait=self.cache_lock_wait,
+            beta=self.cache_refresh_beta,
+        )
+        if use_local:
+            local_cache.set(cache_key, value)
+        return value
+
+    async def aget_hit(self, request, *args, **kwargs):
+        """Response for a fresh cache hit, or None to run the sync view
+
+        Used by ``AsyncHitMixin``. Only anonymous-safe GETs qualify: any
+        permission or throttle check might need the database.
+        """
+        if request.method not in ("GET", "HEAD"):
+            return None
+        self.request = request = self.initialize_request(request, *args, **kwargs)
+        self.headers = self.default_response_headers
+        if self.get_throttles() or not all(
+            isinstance(permission, AllowAny) for permission in self.get_permissions()
+        ):
+            return None
+        self.format_kwarg = self.get_format_suffix(**kwargs)
+        try:
+            negotiated = self.perform_content_negotiation(request)
+        except APIException:
+            return None
+        request.accepted_renderer, request.accepted_media_type = negotiated
+        return await self.ahandle_hit()
+
+    async def ahandle_hit(self):
+        return None
+
+    async def aget_cached(self, cache_key):
+        """Async read of ``get_cached`` entries, MISSING unless fresh"""
+        value = MISSING
+        if self.cache_local and local_cache_enabled():
+            value = self.get_local(cache_key)
+        if value is MISSING:
+            value = await aget_fresh(cache_key, self.cache_refresh_beta)
+        if value is not MISSING:
+            await arecord_request(self.request)  # misses count on the sync path
+        return value
+
+    def hit_response(self, data):
+        return self.finalize_response(self.request, Response(data)).render()
+
+
+class CacheListMixin(StampedeProtectionMixin):
     """Handles list view caching with auto-invalidation"""
 
     cache_timeout = 60 * 5  # 5 minutes default
+    cache_ignored_params = ("format",)
+    cache_param_defaults = {}
+    cache_rendered = False  # cache the rendered body instead of response.data
+    cache_rendered_formats = ("json",)
+    # Query params filtering the list on equality with the model field of the
+    # same name, among its cache_partitions: entries then survive writes to
+    # rows outside their partition.
+    cache_partition_params = ()
+
+    def caches_rendered(self):
+        renderer = getattr(self.request, "accepted_renderer", None)
+        return self.cache_rendered and (
+            renderer is not None and renderer.format in self.cache_rendered_formats
+        )
+
+    def get_cache_param_defaults(self):
+        """Declared defaults plus the paginator's, so each page has its own key"""
+        defaults = {}
+        if (paginator := self.paginator) is not None:
+            page_size_param = getattr(paginator, "page_size_query_param", None)
+            if page_size_param and paginator.page_size is not None:
+                defaults[page_size_param] = paginator.page_size
+        return {**defaults, **self.cache_param_defaults}
+
+    def get_cache_partition(self):
+        fields = partition_fields(self.queryset.model)
+        partition = {}
+        for name in self.cache_partition_params:
+            value = self.request.query_params.get(name)
+            if name in fields and value not in (None, ""):
+                partition[name] = value
+        return partition
 
     def get_cache_key(self):
-        model_name = self.queryset.model.__name__.lower()
-        params = {
-            k: v
-            for k, v in self.request.query_params.dict().items()
-            if k not in ["page", "format", "page_size"]
-        }
-        return f"{model_name}_list:{hash(frozenset(params.items()))}"
+        variant = None
+        if self.caches_rendered():
+            variant = self.request.accepted_renderer.format
+        return list_cache_key(
+            self.queryset.model,
+            variant,
+            params=self.request.query_params,
+            ignore=self.cache_ignored_params,
+            defaults=self.get_cache_param_defaults(),
+            partition=self.get_cache_partition(),
+        )
+
+    async def aget_cache_key(self):
+        if getattr(self, "_cache_key", None) is None:
+            variant = None
+            if self.caches_rendered():
+                variant = self.request.accepted_renderer.format
+            self._cache_key = await alist_cache_key(
+                self.queryset.model,
+                variant,
+                params=self.request.query_params,
+                ignore=self.cache_ignored_params,
+                defaults=self.get_cache_param_defaults(),
+                partition=self.get_cache_partition(),
+            )
+        return self._cache_key
+
+    async def ahandle_hit(self):
+        value = await self.aget_cached(await self.aget_cache_key())
+        if value is MISSING:
+            return None
+        if self.caches_rendered():
+            return value.to_response()
+        return self.hit_response(value)
 
     def list(self, request, *args, **kwargs):
-        cache_key = self.get_cache_key()
-        if (data := cache.get(cache_key)) is not None:
-            return Response(data)
+        compute = super().list
+        if self.caches_rendered():
+            payload = self.get_cached(
+                self.get_cache_key(),
+                "LIST",
+                lambda: RenderedPayload.from_response(
+                    self, compute(request, *args, **kwargs)
+                ),
+            )
+            return payload.to_response()
 
-        response = super().list(request, *args, **kwargs)
-        cache.set(cache_key, response.data, timeout=self.cache_timeout)
-        return response
+        data = self.get_cached(
+            self.get_cache_key(),
+            "LIST",
+            lambda: compute(request, *args, **kwargs).data,
+        )
+        return Response(data)
 
 
-class CacheDetailMixin:
+class CacheDetailMixin(StampedeProtectionMixin):
     """Handles detail view caching with auto-invalidation"""
 
     cache_timeout = 60 * 30  # 30 minutes default
+    # Recompute entries in the background after writes instead of evicting
+    # them, when CACHE_REFRESH_ON_WRITE is enabled
+    cache_refresh_on_write = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.cache_refresh_on_write and getattr(cls, "queryset", None) is not None:
+            register_detail_refresh(cls.queryset.model, cls)
 
     def get_cache_key(self):
         model_name = self.queryset.model.__name__.lower()
-        return f"{model_name}_detail_{self.kwargs['pk']}"
+        return detail_cache_key(model_name, self.kwargs["pk"])
 
-    def retrieve(self, request, *args, **kwargs):
-        cache_key = self.get_cache_key()
-        if (data := cache.get(cache_key)) is not None:
-            return Response(data)
+    @classmethod
+    def refresh_details(cls, pks):
+        """Store fresh entries for these rows, after their write committed
+
+        Rows that could not be refreshed (deleted since, lock never freed)
+        are evicted instead.
+        """
+        view = cls()
+        view.request = view.format_kwarg = None
+        refreshed = [pk for pk in pks if cls.refresh_detail(view, pk)]
+        if refreshed and local_cache_enabled():
+            model_name = cls.queryset.model.__name__.lower()
+            invalidation_bus.publish(
+                [detail_cache_key(model_name, pk) for pk in refreshed]
+            )
+        cls.evict_details([pk for pk in pks if pk not in refreshed])
+
+    @classmethod
+    def refresh_detail(cls, view, pk):
+        """Store a fresh entry for one row, returning whether it was stored
+
+        The row is read under the entry's lock, so a refresh that started
+        earlier cannot store an older body over it. The validators move
+        forward only after the new body is stored, so clients never pair
+        the previous body with the new ETag.
+        """
+        model_name = cls.queryset.model.__name__.lower()
+        soft_ttl, hard_ttl = view.get_cache_ttl("DETAIL")
+        rows = []
 
-        response = super().retrieve(request, *args, **kwargs)
-        cache.set(cache_key, response.data, timeout=self.cache_timeout)
-        return response
+        def compute():
+            rows[:] = cls.queryset.filter(pk=pk)
+            return view.get_serializer(rows[0]).data if rows else None
+
+        return refresh(
+            detail_cache_key(model_name, pk),
+            compute,
+            soft_ttl,
+            hard_ttl,
+            cls.cache_lock_timeout,
+            cacheable=lambda data: data is not None,
+            on_store=lambda data: record_writes(model_name, rows),
+        )
+
+    @classmethod
+    def evict_details(cls, pks):
+        """Evict the entries and validators of these rows"""
+        if not pks:
+            return
+        model_name = cls.queryset.model.__name__.lower()
+        keys = [detail_cache_key(model_name, pk) for pk in pks]
+        cache.delete_many([*keys, *(modified_key(model_name, pk) for pk in pks)])
+        if local_cache_enabled():
+            invalidation_bus.publish(keys)
+
+    async def ahandle_hit(self):
+        value = await self.aget_cached(self.get_cache_key())
+        return None if value is MISSING else self.hit_response(value)
+
+    def retrieve(self, request, *args, **kwargs):
+        compute = super().retrieve
+        data = self.get_cached(
+            self.get_cache_key(),
+            "DETAIL",
+            lambda: compute(request, *args, **kwargs).data,
+        )
+        return Response(data)
 
 
 class AutoInvalidateMixin:
@@ -54,16 +289,15 @@ class AutoInvalidateMixin:
     def register_model(cls, model_class):
         """Call this in models.py to connect signals"""
 
-        @receiver([post_save, post_delete], sender=model_class)
+        @receiver([post_save, post_delete], sender=model_class, weak=False)
         def invalidate_cache(sender, instance, **kwargs):
-            model_name = sender.__name__.lower()
-
-            # Invalidate detail view
-            cache.delete(f"{model_name}_detail_{instance.pk}")
-
-            # Invalidate all list views
-            keys = cache.keys(f"{model_name}_list:*")
-            if keys:
-                cache.delete_many(keys)
+            # Evicts the detail view (in Redis and in every worker's LRU),
+            # the list views of the partitions the row left or entered, and
+            # every GraphQL result depending on the model, and moves the
+            # conditional GET validators forward. Deferred to the end of the
+            # surrounding invalidation_batch() or transaction, if any.
+            deleted = kwargs.get("signal") is post_delete
+            created = kwargs.get("created", False)
+            queue_invalidation(sender, [instance], deleted=deleted, created=created)
 
         return invalidate_cache
@@ -0,0 +1,74 @@
+# core/cache/partitions.py
+from itertools import combinations
+
+from .tags import lists_tag, partition_tag
+
+
+def partition_fields(model):
+    return tuple(getattr(model, "cache_partitions", ()))
+
+
+def partition_state(instance):
+    """Partition field values of ``instance``, None if any is deferred"""
+    state = {}
+    for name in partition_fields(type(instance)):
+        attname = instance._meta.get_field(name).attname
+        if attname not in instance.__dict__:
+            return None
+        state[name] = instance.__dict__[attname]
+    return state
+
+
+def state_tags(model, state):
+    """Tags of every partition a row with this ``state`` belongs to
+
+    A row with ``segment=a, location=b`` is in the unfiltered lists and in
+    those filtered on ``segment=a``, ``location=b`` or both.
+    """
+    fields = sorted(state)
+    return {
+        partition_tag(model, {field: state[field] for field in subset})
+        for size in range(len(fields) + 1)
+        for subset in combinations(fields, size)
+    }
+
+
+def written_list_tags(model, instances, created=False):
+    """Tags of the lists written rows were in before the write or are in now
+
+    The state before comes from the values the row was loaded with. When
+    it is unknown (an instance built by hand and saved over an existing
+    row), every list of the model is invalidated. The loaded values move
+    forward, so the next write of the same instance starts from these.
+    """
+    if not partition_fields(model):
+        return {lists_tag(model)}
+    tags = set()
+    for instance in instances:
+        current = partition_state(instance)
+        previous = getattr(instance, "_partition_state", None)
+        if current is None or (previous is None and not created):
+            tags.add(lists_tag(model))
+        else:
+            tags |= state_tags(model, current)
+            if previous is not None and previous != current:
+                tags |= state_tags(model, previous)
+        if current is not None:
+            instance._partition_state = current
+    return tags
+
+
+class PartitionedModelMixin:
+    """Model mixin remembering the ``cache_partitions`` values it was loaded with
+
+    List views filtering on those fields with ``cache_partition_params``
+    then only lose the entries of the partitions a write touched.
+    """
+
+    cache_partitions = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._partition_state = partition_state(instance)
+        return instance
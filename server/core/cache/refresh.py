@@ -0,0 +1,59 @@
+# core/cache/refresh.py
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_views = {}  # model -> detail view refreshing its entries on write
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def refresh_settings():
+    return {
+        "ENABLED": False,
+        "WORKERS": 2,
+        **getattr(settings, "CACHE_REFRESH_ON_WRITE", {}),
+    }
+
+
+def register_detail_refresh(model, view_class):
+    _views[model] = view_class
+
+
+def refreshing_view(model):
+    """Detail view refreshing ``model`` entries on write, None if disabled"""
+    if not refresh_settings()["ENABLED"]:
+        return None
+    return _views.get(model)
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=refresh_settings()["WORKERS"],
+                    thread_name_prefix="cache-refresh",
+                )
+    return _executor
+
+
+def schedule_detail_refresh(view_class, pks):
+    """Recompute the detail entries of ``pks`` on a background thread"""
+    return executor().submit(_refresh, view_class, list(pks))
+
+
+def _refresh(view_class, pks):
+    try:
+        view_class.refresh_details(pks)
+    except Exception:
+        logger.exception("Refreshing cached %s failed", view_class.__name__)
+        view_class.evict_details(pks)
+    finally:
+        connections.close_all()  # this thread's connections
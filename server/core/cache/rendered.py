@@ -0,0 +1,31 @@
+# core/cache/rendered.py
+from dataclasses import dataclass
+
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+
+@dataclass
+class RenderedPayload:
+    """Final response body, cached so hits skip unpickling and rendering
+
+    Validators are not stored: ``ConditionalListMixin`` derives them from
+    the cache key without reading the entry.
+    """
+
+    body: bytes
+    content_type: str
+
+    @classmethod
+    def from_response(cls, view, response):
+        response = view.finalize_response(view.request, response)
+        response.render()
+        return cls(
+            body=response.content,
+            content_type=response["Content-Type"],
+        )
+
+    def to_response(self):
+        response = HttpResponse(self.body, content_type=self.content_type)
+        patch_vary_headers(response, ["Accept"])
+        return response
@@ -0,0 +1,158 @@
+# core/cache/stampede.py
+import math
+import random
+import time
+import uuid
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.metrics import cache_namespace, record_lookup
+
+from .codecs import Codec, encode
+
+
+@dataclass
+class CacheEntry:
+    """Cached value plus the bookkeeping needed for stale-while-revalidate"""
+
+    value: object
+    soft_expires: float
+    delta: float  # seconds the last recomputation took
+    encoded: bool = False  # value is a CACHE_CODECS payload
+
+    def load(self):
+        return Codec.loads(self.value) if self.encoded else self.value
+
+
+def resolve_ttl(name, default):
+    """Soft and hard TTL for a ``CACHE_TTL`` entry
+
+    An entry is either a plain number of seconds (soft == hard, no stale
+    window) or a dict with ``SOFT`` and ``HARD`` keys.
+    """
+    ttl = getattr(settings, "CACHE_TTL", {}).get(name, default)
+    if isinstance(ttl, dict):
+        soft = ttl.get("SOFT", default)
+        return soft, max(ttl.get("HARD", soft), soft)
+    return ttl, ttl
+
+
+def lock_key(key):
+    return f"{key}:lock"
+
+
+def _acquire(key, timeout):
+    token = uuid.uuid4().hex
+    return token if cache.add(lock_key(key), token, timeout=timeout) else None
+
+
+def _release(key, token):
+    if cache.get(lock_key(key)) == token:
+        cache.delete(lock_key(key))
+
+
+def should_refresh(entry, beta):
+    """Soft expiry, brought forward probabilistically (XFetch) when beta > 0"""
+    now = time.time()
+    if beta > 0:
+        now -= entry.delta * beta * math.log(1.0 - random.random())
+    return now >= entry.soft_expires
+
+
+def _store(key, compute, soft_ttl, hard_ttl, cacheable=None):
+    started = time.time()
+    value = compute()
+    delta = time.time() - started
+    if cacheable is None or cacheable(value):
+        payload, encoded = encode(cache_namespace(key), value)
+        entry = CacheEntry(payload, started + soft_ttl, delta, encoded)
+        cache.set(key, entry, timeout=hard_ttl)
+    return value
+
+
+def _recompute(key, token, compute, soft_ttl, hard_ttl, cacheable):
+    try:
+        return _store(key, compute, soft_ttl, hard_ttl, cacheable)
+    finally:
+        _release(key, token)
+
+
+def refresh(
+    key,
+    compute,
+    soft_ttl,
+    hard_ttl,
+    lock_timeout=10,
+    poll_interval=0.05,
+    cacheable=None,
+    on_store=None,
+):
+    """Replace an entry with a freshly computed value, without a miss
+
+    Runs under the entry's lock. A holder may have read the rows before the
+    write being refreshed, so ``compute`` only runs once it is released and
+    stores last; ``compute`` must read the rows itself. If the lock is not
+    free within ``lock_timeout``, the entry is deleted instead.
+    ``on_store(value)`` runs after the store, before the lock is released.
+    Returns whether the entry was stored.
+    """
+    deadline = time.monotonic() + lock_timeout
+    while (token := _acquire(key, lock_timeout)) is None:
+        if time.monotonic() >= deadline:
+            cache.delete(key)
+            return False
+        time.sleep(poll_interval)
+    try:
+        value = _store(key, compute, soft_ttl, hard_ttl, cacheable)
+        stored = cacheable is None or cacheable(value)
+        if stored and on_store is not None:
+            on_store(value)
+    finally:
+        _release(key, token)
+    return stored
+
+
+def get_or_compute(
+    key,
+    compute,
+    soft_ttl,
+    hard_ttl,
+    lock_timeout=10,
+    lock_wait=2.0,
+    poll_interval=0.05,
+    beta=1.0,
+    cacheable=None,
+):
+    """Single-flight read-through cache with stale-while-revalidate
+
+    Only the caller holding the short ``<key>:lock`` recomputes. While it
+    runs, other callers get the stale value if there is one, or poll for
+    up to ``lock_wait`` seconds before falling back to computing it
+    themselves. Values for which ``cacheable`` returns False are returned
+    but not stored.
+    """
+    entry = cache.get(key)
+    if isinstance(entry, CacheEntry):
+        if not should_refresh(entry, beta):
+            record_lookup(key, "hit")
+            return entry.load()
+        record_lookup(key, "stale")
+        if (token := _acquire(key, lock_timeout)) is None:
+            return entry.load()
+        return _recompute(key, token, compute, soft_ttl, hard_ttl, cacheable)
+
+    record_lookup(key, "miss")
+    if (token := _acquire(key, lock_timeout)) is not None:
+        return _recompute(key, token, compute, soft_ttl, hard_ttl, cacheable)
+
+    deadline = time.monotonic() + lock_wait
+    while time.monotonic() < deadline:
+        time.sleep(poll_interval)
+        entry = cache.get(key)
+        if isinstance(entry, CacheEntry):
+            return entry.load()
+        if cache.get(lock_key(key)) is None:
+            break  # holder failed without storing anything
+    return _store(key, compute, soft_ttl, hard_ttl, cacheable)
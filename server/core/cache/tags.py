@@ -0,0 +1,103 @@
+# core/cache/tags.py
+from .keys import (
+    aget_generations,
+    build_cache_key,
+    bump_generation,
+    get_generations,
+    stable_digest,
+)
+
+
+def model_tag(model):
+    return model._meta.label_lower
+
+
+def partition_tag(model, values):
+    """Tag of the lists of ``model`` filtered on ``field == value`` pairs
+
+    An empty ``values`` is the partition of the unfiltered lists.
+    """
+    items = sorted((field, str(value)) for field, value in values.items())
+    return f"{model_tag(model)}:part:{stable_digest(items)}"
+
+
+def lists_tag(model):
+    """Tag every list of ``model`` depends on, whatever its partition"""
+    return f"{model_tag(model)}:lists"
+
+
+def tag_namespace(tag):
+    return f"tag:{tag}"
+
+
+def get_tag_versions(tags):
+    """Current version of each tag, fetched in a single round-trip"""
+    generations = get_generations([tag_namespace(tag) for tag in tags])
+    return {tag: generations[tag_namespace(tag)] for tag in tags}
+
+
+async def aget_tag_versions(tags):
+    generations = await aget_generations([tag_namespace(tag) for tag in tags])
+    return {tag: generations[tag_namespace(tag)] for tag in tags}
+
+
+def invalidate_tags(tags):
+    """Evict every entry depending on ``tags``: one INCR per tag, no key scan"""
+    for tag in set(tags):
+        bump_generation(tag_namespace(tag))
+
+
+def tagged_cache_key(namespace, tags, *parts, params=None, ignore=(), defaults=None):
+    """Key that embeds the versions of the tags the entry depends on
+
+    Bumping any of those tags makes the key unreachable, and the orphaned
+    entry ages out through its TTL.
+    """
+    versions = sorted(get_tag_versions(tags).items())
+    return build_cache_key(
+        namespace, versions, *parts, params=params, ignore=ignore, defaults=defaults
+    )
+
+
+async def atagged_cache_key(
+    namespace, tags, *parts, params=None, ignore=(), defaults=None
+):
+    versions = sorted((await aget_tag_versions(tags)).items())
+    return build_cache_key(
+        namespace, versions, *parts, params=params, ignore=ignore, defaults=defaults
+    )
+
+
+def list_tags(model, partition=None):
+    return [partition_tag(model, partition or {}), lists_tag(model)]
+
+
+def list_cache_key(
+    model, *parts, params=None, ignore=(), defaults=None, partition=None
+):
+    """List key depending on the rows of ``model`` in ``partition``
+
+    ``partition`` holds the equality filters on ``cache_partitions`` fields
+    the list applies; without it the list depends on every row.
+    """
+    return tagged_cache_key(
+        f"{model.__name__.lower()}_list",
+        list_tags(model, partition),
+        *parts,
+        params=params if params is not None else {},
+        ignore=ignore,
+        defaults=defaults,
+    )
+
+
+async def alist_cache_key(
+    model, *parts, params=None, ignore=(), defaults=None, partition=None
+):
+    return await atagged_cache_key(
+        f"{model.__name__.lower()}_list",
+        list_tags(model, partition),
+        *parts,
+        params=params if params is not None else {},
+        ignore=ignore,
+        defaults=defaults,
+    )
@@ -0,0 +1,110 @@
+# core/cache/warming.py
+import json
+import random
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+
+from .aio import native_client
+from .local import redis_client
+
+WARM_HEADER = "HTTP_X_CACHE_WARM"  # set on the warm_cache command's requests
+
+_counts = Counter()  # recorded requests when the cache is not Redis
+_counts_lock = threading.Lock()
+
+
+def warm_settings():
+    return {
+        "RECORD": False,
+        "SAMPLE_RATE": 0.01,
+        "KEY": "cache:hot",
+        "MAX_KEYS": 1000,
+        "QUERIES": [],
+        **getattr(settings, "WARM_CACHE", {}),
+    }
+
+
+def _uses_redis():
+    try:
+        from django_redis.cache import RedisCache
+    except ImportError:
+        return False
+    return isinstance(caches[DEFAULT_CACHE_ALIAS], RedisCache)  # not the proxy
+
+
+def _recipe(request, body):
+    """Request to replay, recorded instead of the cache key
+
+    Keys embed tag versions, so a recorded key is stale after the next
+    write; replaying the request computes the entry under current ones.
+    """
+    return json.dumps(
+        {"method": request.method, "path": request.get_full_path(), "body": body},
+        sort_keys=True,
+    )
+
+
+def _sampled(request):
+    config = warm_settings()
+    if not config["RECORD"] or request.META.get(WARM_HEADER):
+        return None
+    if random.random() >= config["SAMPLE_RATE"]:
+        return None
+    return config
+
+
+def record_request(request, body=None):
+    """Count a sample of cached reads, for ``warm_cache --recorded``
+
+    Requests go to a Redis sorted set shared by the workers, trimmed to
+    the ``MAX_KEYS`` hottest, or to this process when the cache is not
+    Redis.
+    """
+    if (config := _sampled(request)) is None:
+        return
+    recipe = _recipe(request, body)
+    if not _uses_redis():
+        with _counts_lock:
+            _counts[recipe] += 1
+        return
+    pipeline = redis_client().pipeline(transaction=False)
+    pipeline.zincrby(config["KEY"], 1, recipe)
+    pipeline.zremrangebyrank(config["KEY"], 0, -config["MAX_KEYS"] - 1)
+    pipeline.execute()
+
+
+async def arecord_request(request, body=None):
+    """``record_request`` for async cache hits, without a thread under Redis"""
+    if (config := _sampled(request)) is None:
+        return
+    if (client := native_client()) is None:
+        recipe = _recipe(request, body)
+        with _counts_lock:
+            _counts[recipe] += 1
+        return
+    async with client.pipeline(transaction=False) as pipeline:
+        pipeline.zincrby(config["KEY"], 1, _recipe(request, body))
+        pipeline.zremrangebyrank(config["KEY"], 0, -config["MAX_KEYS"] - 1)
+        await pipeline.execute()
+
+
+def top_requests(count):
+    """Up to ``count`` recorded requests, hottest first, as dicts"""
+    if count <= 0:
+        return []
+    if _uses_redis():
+        recipes = redis_client().zrevrange(warm_settings()["KEY"], 0, count - 1)
+    else:
+        with _counts_lock:
+            recipes = [recipe for recipe, _ in _counts.most_common(count)]
+    return [json.loads(recipe) for recipe in recipes]
+
+
+def clear_recorded():
+    if _uses_redis():
+        redis_client().delete(warm_settings()["KEY"])
+    with _counts_lock:
+        _counts.clear()
@@ -0,0 +1,110 @@
+from collections import defaultdict
+
+
+class DataLoaderRegistry:
+    """Per-request loaders plus every model instance resolved so far
+
+    graphene executes synchronously here, so a loader cannot wait for its
+    siblings to queue their keys. Instead resolvers ``track`` the
+    instances they return and the first ``load`` of a relation batches
+    the keys of every tracked parent into a single ``IN`` query.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._seen = defaultdict(dict)
+
+    def track(self, instances):
+        for instance in instances:
+            self._seen[type(instance)][instance.pk] = instance
+        return instances
+
+    def seen(self, model):
+        return self._seen[model]
+
+    def loader(self, loader_class, *args):
+        key = (loader_class, *args)
+        if key not in self._loaders:
+            self._loaders[key] = loader_class(self, *args)
+        return self._loaders[key]
+
+
+def get_loaders(info):
+    """The registry attached to the request (graphene's ``info.context``)"""
+    registry = getattr(info.context, "dataloaders", None)
+    if registry is None:
+        registry = DataLoaderRegistry()
+        info.context.dataloaders = registry
+    return registry
+
+
+class BatchLoader:
+    """Loads values by key, batching the keys of all tracked parents"""
+
+    parent_model = None
+    key_attname = "pk"
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._results = {}
+
+    def batch_load(self, keys):
+        """Return a dict of key -> value for ``keys``"""
+        raise NotImplementedError
+
+    def default(self):
+        return None
+
+    def pending_keys(self):
+        parents = self.registry.seen(self.parent_model).values()
+        keys = {getattr(parent, self.key_attname) for parent in parents}
+        return {key for key in keys if key is not None and key not in self._results}
+
+    def load(self, key):
+        if key not in self._results:
+            keys = self.pending_keys() | {key}
+            found = self.batch_load(keys)
+            for batch_key in keys:
+                self._results[batch_key] = found.get(batch_key, self.default())
+        return self._results[key]
+
+
+class ReverseRelationLoader(BatchLoader):
+    """Rows of ``model`` grouped by their ``field_name`` foreign key"""
+
+    def __init__(self, registry, model, field_name):
+        super().__init__(registry)
+        field = model._meta.get_field(field_name)
+        self.model = model
+        self.attname = field.attname
+        self.parent_model = field.related_model
+
+    def default(self):
+        return []
+
+    def batch_load(self, keys):
+        rows = self.model.objects.filter(**{f"{self.attname}__in": keys})
+        grouped = defaultdict(list)
+        for row in self.registry.track(list(rows)):
+            grouped[getattr(row, self.attname)].append(row)
+        return grouped
+
+
+class ForeignKeyLoader(BatchLoader):
+    """Targets of ``model.field_name`` by primary key, reusing tracked rows"""
+
+    def __init__(self, registry, model, field_name):
+        super().__init__(registry)
+        field = model._meta.get_field(field_name)
+        self.parent_model = model
+        self.key_attname = field.attname
+        self.target = field.related_model
+
+    def batch_load(self, keys):
+        known = self.registry.seen(self.target)
+        found = {key: known[key] for key in keys if key in known}
+        if missing := keys - found.keys():
+            rows = self.target.objects.in_bulk(missing)
+            found.update(rows)
+            self.registry.track(rows.values())
+        return found
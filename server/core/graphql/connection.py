@@ -0,0 +1,69 @@
+# core/graphql/connection.py
+from django.core.exceptions import ValidationError
+from graphene.relay import PageInfo
+from graphql import GraphQLError
+
+from core.pagination import KeysetPagination
+
+from .optimizer import apply_plan, connection_selection, plan
+
+
+def keyset_connection(
+    connection_type,
+    queryset,
+    info,
+    first=None,
+    last=None,
+    after=None,
+    before=None,
+    pagination_class=KeysetPagination,
+):
+    """One page of a Relay connection, fetched with a keyset range
+
+    Uses the same ordering, page size limits and cursor format as the REST
+    ``pagination_class``, so a page costs one indexed range scan however
+    deep it is. ``first``/``after`` walk forward, ``last``/``before``
+    backward; the other cursor, if any, bounds the walk. The queryset is
+    restricted to the ``edges { node }`` selection plus the ordering
+    columns the cursors are built from.
+    """
+    pagination = pagination_class()
+    if first is not None and last is not None:
+        raise GraphQLError("Pass either first or last, not both.")
+    reverse = last is not None
+    size = last if reverse else first
+    if size is not None and size < 0:
+        raise GraphQLError("first and last cannot be negative.")
+    if size is None:
+        size = pagination.page_size
+    size = min(size, pagination.max_page_size)
+
+    only, select_related, prefetches = plan(
+        queryset.model, connection_selection(info.field_nodes, info), info
+    )
+    queryset = apply_plan(
+        queryset, only | set(pagination.ordering), select_related, prefetches
+    )
+    cursor = before if reverse else after
+    bound = after if reverse else before
+    try:
+        position = pagination.decode_position(cursor)["p"] if cursor else None
+        if bound:
+            bound = pagination.decode_position(bound)["p"]
+            queryset = queryset.filter(pagination.beyond(bound, not reverse))
+        rows, has_more = pagination.fetch(queryset, position, reverse, size)
+    except (ValidationError, ValueError):
+        raise GraphQLError(pagination.invalid_cursor_message)
+
+    edges = [
+        connection_type.Edge(node=row, cursor=pagination.encode_position(row))
+        for row in rows
+    ]
+    came_from = cursor is not None
+    page_info = PageInfo(
+        has_next_page=came_from if reverse else has_more,
+        has_previous_page=has_more if reverse else came_from,
+        start_cursor=edges[0].cursor if edges else None,
+        end_cursor=edges[-1].cursor if edges else None,
+    )
+    return connection_type(edges=edges, page_info=page_info)
@@ -0,0 +1,247 @@
+# core/graphql/cost.py
+from django.conf import settings
+from graphql import (
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    InlineFragmentNode,
+    OperationType,
+    get_named_type,
+    get_nullable_type,
+    get_operation_ast,
+    is_list_type,
+    specified_rules,
+    value_from_ast_untyped,
+)
+from graphql.execution import ExecutionResult
+from graphql.validation import ValidationRule
+
+PAGE_ARGUMENTS = ("first", "last")
+
+
+def cost_settings():
+    defaults = {
+        "MAX_COST": 5000,
+        "MAX_DEPTH": 8,
+        "LIST_SIZE": 100,  # assumed length of lists without a page argument
+        "FIELD_COSTS": {},  # "Type.field" -> weight
+        "LIST_SIZES": {},  # "Type.field" -> assumed length
+    }
+    return {**defaults, **getattr(settings, "GRAPHQL_COST", {})}
+
+
+def document_fragments(document):
+    return {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+
+
+class CostAnalysis:
+    """Static cost and depth of an operation
+
+    Every object field weighs 1 and scalars 0 unless ``FIELD_COSTS`` says
+    otherwise. A field's children are multiplied by its ``first``/``last``
+    argument when it takes one (``LIST_SIZE`` if omitted), by its assumed
+    length when it returns a list, and by 1 otherwise. Lists directly under
+    a paginated field (connection ``edges``) are already counted by the
+    page size. Introspection fields are free so GraphiQL keeps working.
+    """
+
+    def __init__(self, schema, fragments, variables=None, limits=None):
+        self.schema = schema
+        self.fragments = fragments
+        # Malformed variables are left for execution to report
+        self.variables = variables if isinstance(variables, dict) else {}
+        self.limits = limits or cost_settings()
+
+    def operation(self, operation):
+        """Return ``(cost, depth)`` for an OperationDefinitionNode"""
+        root = {
+            OperationType.QUERY: self.schema.query_type,
+            OperationType.MUTATION: self.schema.mutation_type,
+            OperationType.SUBSCRIPTION: self.schema.subscription_type,
+        }[operation.operation]
+        defaults = {
+            definition.variable.name.value: value_from_ast_untyped(
+                definition.default_value
+            )
+            for definition in operation.variable_definitions or ()
+            if definition.default_value is not None
+        }
+        self.variables = {**defaults, **self.variables}
+        if root is None:
+            return 0, 0
+        return self.selection_set(root, operation.selection_set, 0, False, ())
+
+    def selection_set(self, parent, selection_set, depth, paged, spread):
+        cost, deepest = 0, depth
+        for node in selection_set.selections:
+            if isinstance(node, FieldNode):
+                node_cost, node_depth = self.field(parent, node, depth, paged, spread)
+            elif isinstance(node, InlineFragmentNode):
+                node_type = parent
+                if node.type_condition is not None:
+                    node_type = self.schema.get_type(node.type_condition.name.value)
+                node_cost, node_depth = self.selection_set(
+                    node_type or parent, node.selection_set, depth, paged, spread
+                )
+            elif isinstance(node, FragmentSpreadNode):
+                name = node.name.value
+                fragment = self.fragments.get(name)
+                if fragment is None or name in spread:
+                    continue  # reported by the spec rules
+                node_type = self.schema.get_type(fragment.type_condition.name.value)
+                node_cost, node_depth = self.selection_set(
+                    node_type or parent,
+                    fragment.selection_set,
+                    depth,
+                    paged,
+                    (*spread, name),
+                )
+            cost += node_cost
+            deepest = max(deepest, node_depth)
+        return cost, deepest
+
+    def field(self, parent, node, depth, paged, spread):
+        name = node.name.value
+        fields = getattr(parent, "fields", {})
+        if name.startswith("__") or name not in fields:
+            return 0, depth
+        definition = fields[name]
+        coordinate = f"{parent.name}.{name}"
+        field_type = get_named_type(definition.type)
+        weight = self.limits["FIELD_COSTS"].get(
+            coordinate, 1 if node.selection_set else 0
+        )
+        if not node.selection_set:
+            return weight, depth + 1
+
+        page_size = self.page_size(definition, node)
+        if page_size is not None:
+            multiplier = page_size
+        elif is_list_type(get_nullable_type(definition.type)) and not paged:
+            multiplier = self.limits["LIST_SIZES"].get(
+                coordinate, self.limits["LIST_SIZE"]
+            )
+        else:
+            multiplier = 1
+        children, deepest = self.selection_set(
+            field_type, node.selection_set, depth + 1, page_size is not None, spread
+        )
+        return weight + multiplier * children, deepest
+
+    def page_size(self, definition, node):
+        """Requested page size of a paginated field, None for other fields"""
+        if not any(name in definition.args for name in PAGE_ARGUMENTS):
+            return None
+        for argument in node.arguments or ():
+            if argument.name.value in PAGE_ARGUMENTS:
+                value = value_from_ast_untyped(argument.value, self.variables)
+                if isinstance(value, int):
+                    return max(value, 0)
+        return self.limits["LIST_SIZE"]
+
+
+class QueryCostRule(ValidationRule):
+    """Reject operations over ``GRAPHQL_COST`` depth or cost budgets
+
+    Runs with the spec rules, so the check is paid once per distinct
+    document. Variables are unknown here and count as ``LIST_SIZE`` unless
+    the operation gives them a default.
+    """
+
+    def enter_operation_definition(self, node, *_):
+        limits = cost_settings()
+        fragments = document_fragments(self.context.document)
+        analysis = CostAnalysis(self.context.schema, fragments, limits=limits)
+        cost, depth = analysis.operation(node)
+        for error in limit_errors(node, cost, depth, limits):
+            self.report_error(error)
+
+
+def limit_errors(node, cost, depth, limits):
+    """Errors for an operation over ``MAX_DEPTH`` or ``MAX_COST``"""
+    errors = []
+    if depth > limits["MAX_DEPTH"]:
+        errors.append(
+            GraphQLError(
+                f"Query depth {depth} exceeds the maximum of {limits['MAX_DEPTH']}.",
+                node,
+                extensions={"code": "QUERY_TOO_DEEP", "depth": depth},
+            )
+        )
+    if cost > limits["MAX_COST"]:
+        errors.append(
+            GraphQLError(
+                f"Query cost {cost} exceeds the maximum of {limits['MAX_COST']}.",
+                node,
+                extensions={"code": "QUERY_TOO_COSTLY", "cost": cost},
+            )
+        )
+    return errors
+
+
+class QueryCostMixin:
+    """Enforce ``QueryCostRule`` and report each operation's cost
+
+    The budget is checked again with the request's variables before an
+    operation runs or a cached result is served, since validation counts
+    variable page sizes as ``LIST_SIZE``. The cost is returned under
+    ``extensions.cost`` of every executed response. Needs
+    ``DocumentCachingGraphQLView.get_document``.
+    """
+
+    validation_rules = (*specified_rules, QueryCostRule)
+
+    def get_query_cost(self, document, operation, variables):
+        limits = cost_settings()
+        analysis = CostAnalysis(
+            self.schema.graphql_schema,
+            document_fragments(document),
+            variables,
+            limits,
+        )
+        cost, depth = analysis.operation(operation)
+        return {"requested": cost, "limit": limits["MAX_COST"], "depth": depth}
+
+    def get_limit_errors(self, operation, cost):
+        return limit_errors(
+            operation, cost["requested"], cost["depth"], cost_settings()
+        )
+
+    def prepare_hit(self, request, document, operation, variables):
+        cost = self.get_query_cost(document, operation, variables)
+        if self.get_limit_errors(operation, cost):
+            return False  # the sync view reports the errors
+        request.query_cost = cost
+        return super().prepare_hit(request, document, operation, variables)
+
+    def get_response(self, request, data, show_graphiql=False):
+        request.query_cost = None  # batched entries share the request
+        return super().get_response(request, data, show_graphiql)
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        operation = None
+        if query:
+            document, errors = self.get_document(request, query)
+            operation = None if errors else get_operation_ast(document, operation_name)
+        if operation is not None:
+            cost = self.get_query_cost(document, operation, variables)
+            if errors := self.get_limit_errors(operation, cost):
+                return ExecutionResult(data=None, errors=errors)
+        result = super().execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        if result is not None and operation is not None:
+            request.query_cost = cost
+        return result
+
+    def json_encode(self, request, d, pretty=False):
+        if (cost := getattr(request, "query_cost", None)) is not None:
+            d = {**d, "extensions": {**d.get("extensions", {}), "cost": cost}}
+        return super().json_encode(request, d, pretty)
@@ -0,0 +1,198 @@
+# core/graphql/documents.py
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.db import connection, transaction
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView, HttpError
+from graphql import (
+    ExecutionResult,
+    GraphQLError,
+    OperationType,
+    execute,
+    get_operation_ast,
+    parse,
+    validate,
+    validate_schema,
+)
+
+from core.metrics import CallbackMetric, registry
+
+from .persisted import document_hash
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class DocumentCache:
+    """Bounded, thread-safe LRU of parsed and validated DocumentNodes
+
+    Only documents that passed validation are stored, so junk queries
+    cannot evict the hot operations.
+    """
+
+    def __init__(self, max_size=512):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query_hash):
+        with self._lock:
+            document = self._documents.get(query_hash)
+            if document is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._documents.move_to_end(query_hash)
+            return document
+
+    def set(self, query_hash, document):
+        with self._lock:
+            self._documents[query_hash] = document
+            self._documents.move_to_end(query_hash)
+            while len(self._documents) > self.max_size:
+                self._documents.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self.hits = self.misses = 0
+
+    def info(self):
+        """Hit/miss counters in the shape of functools' ``cache_info()``"""
+        with self._lock:
+            size = len(self._documents)
+            return CacheInfo(self.hits, self.misses, self.max_size, size)
+
+
+class DocumentCachingGraphQLView(GraphQLView):
+    """GraphQLView that parses and validates each distinct query once
+
+    Documents are kept per process in ``document_cache``, keyed by the
+    sha256 of the query text, so the hot path goes straight to execution.
+    Execution itself mirrors ``GraphQLView.execute_graphql_request``.
+    """
+
+    document_cache = DocumentCache()
+
+    def get_document(self, request, query):
+        """Return ``(document, errors)`` for ``query``, using the LRU"""
+        query_hash = getattr(request, "query_hash", None) or document_hash(query)
+        memo = getattr(request, "graphql_document", None)
+        if memo is not None and memo[0] == query_hash:
+            return memo[1], memo[2]
+
+        document, errors = self.load_document(query_hash, query)
+        request.graphql_document = (query_hash, document, errors)
+        return document, errors
+
+    def load_document(self, query_hash, query):
+        if (document := self.document_cache.get(query_hash)) is not None:
+            return document, []
+
+        try:
+            document = parse(query)
+        except GraphQLError as error:
+            return None, [error]
+        errors = validate(
+            self.schema.graphql_schema,
+            document,
+            self.validation_rules,
+            graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+        if not errors:
+            self.document_cache.set(query_hash, document)
+        return document, errors
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        document, errors = self.get_document(request, query)
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    "Can only perform a {} operation from a POST request.".format(
+                        operation_ast.operation.value
+                    ),
+                )
+            )
+
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options["execution_context_class"] = (
+                    self.execution_context_class
+                )
+
+            if (
+                operation_ast is not None
+                and operation_ast.operation == OperationType.MUTATION
+                and (
+                    graphene_settings.ATOMIC_MUTATIONS is True
+                    or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+                )
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+
+            return execute(schema, document, **execute_options)
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+
+def _document_cache_metric(name, documentation, field, kind="counter"):
+    def collect():
+        return {(): getattr(DocumentCachingGraphQLView.document_cache.info(), field)}
+
+    registry.register(CallbackMetric(name, documentation, collect, kind))
+
+
+_document_cache_metric(
+    "graphql_document_cache_hits_total",
+    "Queries whose parsed and validated document came from the LRU.",
+    "hits",
+)
+_document_cache_metric(
+    "graphql_document_cache_misses_total",
+    "Queries parsed and validated because the LRU lacked them.",
+    "misses",
+)
+_document_cache_metric(
+    "graphql_document_cache_entries",
+    "Validated documents held in the LRU.",
+    "currsize",
+    kind="gauge",
+)
@@ -0,0 +1,145 @@
+# core/graphql/optimizer.py
+from django.db.models import Prefetch
+from graphene.utils.str_converters import to_camel_case
+from graphql.language import (
+    FieldNode,
+    FragmentSpreadNode,
+    InlineFragmentNode,
+    SelectionSetNode,
+)
+
+
+def selected_fields(selection_set, info):
+    """FieldNodes of a selection set, with fragments expanded"""
+    if selection_set is None:
+        return
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            yield selection
+        elif isinstance(selection, InlineFragmentNode):
+            yield from selected_fields(selection.selection_set, info)
+        elif isinstance(selection, FragmentSpreadNode):
+            fragment = info.fragments[selection.name.value]
+            yield from selected_fields(fragment.selection_set, info)
+
+
+def merge_selections(field_nodes):
+    """One selection set holding the selections of every node of a field
+
+    GraphQL resolves a field selected several times (same response key)
+    once, with all the nodes in ``info.field_nodes``.
+    """
+    return SelectionSetNode(
+        selections=tuple(
+            selection
+            for node in field_nodes
+            if node.selection_set is not None
+            for selection in node.selection_set.selections
+        )
+    )
+
+
+def connection_selection(field_nodes, info):
+    """Merged ``edges { node { ... } }`` selections of a connection field"""
+    selections = []
+    for edges in selected_fields(merge_selections(field_nodes), info):
+        if edges.name.value != "edges":
+            continue
+        for node in selected_fields(edges.selection_set, info):
+            if node.name.value == "node" and node.selection_set:
+                selections += node.selection_set.selections
+    return SelectionSetNode(selections=tuple(selections))
+
+
+def graphql_fields(model):
+    """Model fields and reverse relations by the name graphene exposes them"""
+    fields = {}
+    for field in model._meta.get_fields():
+        if field.concrete:
+            fields[to_camel_case(field.name)] = field
+        elif hasattr(field, "get_accessor_name"):
+            fields[to_camel_case(field.get_accessor_name())] = field
+    return fields
+
+
+def plan(model, selection_set, info, prefix=""):
+    """Collect only/select_related/prefetch_related for a selection set"""
+    only = {f"{prefix}{model._meta.pk.name}"}
+    select_related, prefetches = [], []
+
+    fields = graphql_fields(model)
+    # A relation selected more than once (aliases, fragments) is loaded once
+    # with the union of its selections
+    nodes_by_name = {}
+    for node in selected_fields(selection_set, info):
+        nodes_by_name.setdefault(node.name.value, []).append(node)
+    for graphql_name, nodes in nodes_by_name.items():
+        field = fields.get(graphql_name)
+        if field is None:
+            continue
+        name = field.name if field.concrete else field.get_accessor_name()
+        path = f"{prefix}{name}"
+        selection = merge_selections(nodes)
+
+        if field.concrete and (field.many_to_one or field.one_to_one):
+            # Forward relation: join it and keep walking the selection
+            only.add(path)
+            select_related.append(path)
+            nested = plan(field.related_model, selection, info, f"{path}__")
+            only |= nested[0]
+            select_related += nested[1]
+            prefetches += nested[2]
+        elif field.is_relation:
+            # Reverse FK or many-to-many: prefetch an optimized queryset
+            nested = plan(field.related_model, selection, info)
+            if field.one_to_many:
+                # The FK column is what attaches prefetched rows to parents
+                nested[0].add(field.field.name)
+            queryset = field.related_model._default_manager.all()
+            prefetches.append(Prefetch(path, queryset=apply_plan(queryset, *nested)))
+        else:
+            only.add(path)
+    return only, select_related, prefetches
+
+
+def selected_models(model, selection_set, info):
+    """Every model a selection set reads from, for cache tagging"""
+    models = {model}
+    fields = graphql_fields(model)
+    for node in selected_fields(selection_set, info):
+        field = fields.get(node.name.value)
+        if field is not None and field.is_relation and node.selection_set:
+            models |= selected_models(field.related_model, node.selection_set, info)
+    return models
+
+
+def apply_plan(queryset, only, select_related, prefetches):
+    queryset = queryset.only(*only)
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset
+
+
+def optimize_queryset(queryset, info, field_node=None):
+    """Restrict ``queryset`` to what the resolving field's selections need"""
+    field_nodes = [field_node] if field_node is not None else info.field_nodes
+    selection = merge_selections(field_nodes)
+    return apply_plan(queryset, *plan(queryset.model, selection, info))
+
+
+def get_prefetched(instance, accessor):
+    """Rows the optimizer prefetched for ``accessor``, or None"""
+    prefetched = getattr(instance, "_prefetched_objects_cache", {})
+    if accessor in prefetched:
+        return list(prefetched[accessor])
+    return None
+
+
+def get_joined(instance, field_name):
+    """Related object the optimizer joined through select_related, or None"""
+    field = instance._meta.get_field(field_name)
+    if field.is_cached(instance):
+        return field.get_cached_value(instance)
+    return None
@@ -0,0 +1,123 @@
+# core/graphql/persisted.py
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseBadRequest
+from django.utils.cache import cc_delim_re, patch_cache_control
+from graphene_django.views import HttpError
+from graphql import ExecutionResult, GraphQLError
+
+
+def document_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def persisted_query_key(query_hash):
+    return f"apq:{query_hash}"
+
+
+def apq_settings():
+    defaults = {"TTL": 60 * 60 * 24 * 7, "MAX_AGE": 60}
+    return {**defaults, **getattr(settings, "GRAPHQL_APQ", {})}
+
+
+class PersistedQueryMixin:
+    """Automatic persisted queries for a graphene ``GraphQLView``
+
+    Clients send ``extensions.persistedQuery.sha256Hash`` instead of the
+    query text. An unknown hash answers ``PersistedQueryNotFound`` and the
+    client retries once with the full query, which is then stored. GET
+    requests by hash that succeed are marked publicly cacheable so HTTP
+    caches in front of the service can answer them.
+    """
+
+    def get_persisted_query(self, request, data):
+        extensions = request.GET.get("extensions") or data.get("extensions")
+        if isinstance(extensions, str):
+            try:
+                extensions = json.loads(extensions)
+            except ValueError:
+                raise HttpError(HttpResponseBadRequest("Extensions are invalid JSON."))
+        if not isinstance(extensions, dict):
+            return None
+        return extensions.get("persistedQuery")
+
+    def get_graphql_params(self, request, data):
+        query, variables, operation_name, id = super().get_graphql_params(request, data)
+        if query is not None and not isinstance(query, str):
+            raise HttpError(HttpResponseBadRequest("Query must be a string."))
+        persisted = self.get_persisted_query(request, data)
+        if not persisted:
+            request.query_hash = document_hash(query) if query else None
+            return query, variables, operation_name, id
+
+        query_hash = persisted.get("sha256Hash")
+        if persisted.get("version") != 1 or not isinstance(query_hash, str):
+            raise HttpError(HttpResponseBadRequest("Unsupported persisted query."))
+        if query:
+            if document_hash(query) != query_hash:
+                message = "Provided sha does not match query."
+                raise HttpError(HttpResponseBadRequest(message))
+            cache.set(persisted_query_key(query_hash), query, apq_settings()["TTL"])
+        else:
+            query = cache.get(persisted_query_key(query_hash))
+            request.persisted_query_not_found = query is None
+        request.query_hash = query_hash
+        request.persisted_query = True
+        return query, variables, operation_name, id
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        if getattr(request, "persisted_query_not_found", False):
+            error = GraphQLError(
+                "PersistedQueryNotFound",
+                extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+            )
+            return ExecutionResult(errors=[error])
+
+        result = super().execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+        request.http_cacheable = bool(
+            request.method == "GET"
+            and getattr(request, "persisted_query", False)
+            and result is not None
+            and not result.errors
+        )
+        return result
+
+    async def aget_hit(self, request, *args, **kwargs):
+        # Registrations and lookups by hash go through the sync view
+        try:
+            persisted = self.get_persisted_query(request, self.parse_body(request))
+        except HttpError:
+            return None
+        if persisted:
+            return None
+        return await super().aget_hit(request, *args, **kwargs)
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if getattr(request, "http_cacheable", False) and response.status_code == 200:
+            make_publicly_cacheable(request, response, apq_settings()["MAX_AGE"])
+        return response
+
+
+def make_publicly_cacheable(request, response, max_age):
+    """Let shared caches store the response: no CSRF cookie, no Vary: Cookie"""
+    request.META["CSRF_COOKIE_NEEDS_UPDATE"] = False
+    response.cookies.pop(settings.CSRF_COOKIE_NAME, None)
+    if response.has_header("Vary"):
+        vary = [
+            header
+            for header in cc_delim_re.split(response["Vary"])
+            if header.lower() != "cookie"
+        ]
+        if vary:
+            response["Vary"] = ", ".join(vary)
+        else:
+            del response["Vary"]
+    patch_cache_control(response, public=True, max_age=max_age)
@@ -0,0 +1,177 @@
+# core/graphql/views.py
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.http import HttpResponse
+from graphene_django.views import HttpError
+from graphql import OperationType, get_named_type, get_operation_ast
+
+from core.cache.aio import AsyncHitMixin, aget_fresh
+from core.cache.local import MISSING
+from core.cache.stampede import get_or_compute, resolve_ttl
+from core.cache.tags import atagged_cache_key, model_tag, tagged_cache_key
+from core.cache.warming import arecord_request, record_request
+
+from .cost import QueryCostMixin, document_fragments
+from .documents import DocumentCachingGraphQLView
+from .optimizer import connection_selection, selected_fields, selected_models
+from .persisted import PersistedQueryMixin, document_hash
+
+
+def operation_models(schema, document, operation):
+    """Models read by a query operation, found from its root fields' types"""
+    context = SimpleNamespace(fragments=document_fragments(document))
+    models = set()
+    for node in selected_fields(operation.selection_set, context):
+        field = schema.query_type.fields.get(node.name.value)
+        if field is None:
+            continue
+        graphene_type = getattr(get_named_type(field.type), "graphene_type", None)
+        selection_set = node.selection_set
+        meta = getattr(graphene_type, "_meta", None)
+        if (node_type := getattr(meta, "node", None)) is not None:
+            # Relay connection: the models are read under edges.node
+            meta = node_type._meta
+            selection_set = connection_selection([node], context)
+        model = getattr(meta, "model", None)
+        if model is not None:
+            models |= selected_models(model, selection_set, context)
+    return models
+
+
+class CachedGraphQLView(DocumentCachingGraphQLView):
+    """GraphQLView that caches the execution result of query operations
+
+    A hit returns the stored, already-resolved result, so neither the ORM
+    nor graphene's resolver tree runs. Keys embed the versions of the
+    model tags the operation reads, so AutoInvalidateMixin evicts them on
+    writes. Results with errors are never stored.
+    """
+
+    cache_ttl_setting = "GRAPHQL"
+    cache_timeout = 60 * 15
+    cache_lock_timeout = 10
+    cache_lock_wait = 2.0
+    cache_refresh_beta = 1.0
+
+    def get_cache_tags(self, document, operation):
+        models = operation_models(self.schema.graphql_schema, document, operation)
+        return [model_tag(model) for model in models]
+
+    def get_cache_key(
+        self, document, operation, query_hash, variables, operation_name
+    ):
+        return tagged_cache_key(
+            "gql",
+            self.get_cache_tags(document, operation),
+            operation_name or "default",
+            variables,
+            query_hash,
+        )
+
+    async def aget_cache_key(
+        self, document, operation, query_hash, variables, operation_name
+    ):
+        return await atagged_cache_key(
+            "gql",
+            self.get_cache_tags(document, operation),
+            operation_name or "default",
+            variables,
+            query_hash,
+        )
+
+    def warm_body(self, request, query, variables, operation_name):
+        """Body replaying this operation from ``warm_cache``, None for GETs"""
+        if request.method != "POST":
+            return None
+        return {"query": query, "variables": variables, "operationName": operation_name}
+
+    def prepare_hit(self, request, document, operation, variables):
+        """Hook run before ``aget_hit`` serves a cached result
+
+        Returning False leaves the request to the sync view instead.
+        """
+        return True
+
+    async def aget_hit(self, request, *args, **kwargs):
+        """Cached result of a query operation, or None to run the sync view
+
+        Used by ``AsyncHitMixin``: everything up to the cache read is CPU
+        work on the per-process document cache, so a hit needs no thread.
+        """
+        caching = getattr(settings, "GRAPHQL_CACHING", False)
+        if not caching or self.batch or request.method not in ("GET", "POST"):
+            return None
+        try:
+            data = self.parse_body(request)
+            if self.graphiql and self.can_display_graphiql(request, data):
+                return None
+            query, variables, operation_name, _ = self.get_graphql_params(
+                request, data
+            )
+        except HttpError:
+            return None
+        if not query:
+            return None
+
+        document, errors = self.get_document(request, query)
+        operation = None if errors else get_operation_ast(document, operation_name)
+        if operation is None or operation.operation != OperationType.QUERY:
+            return None
+        query_hash = getattr(request, "query_hash", None) or document_hash(query)
+        cache_key = await self.aget_cache_key(
+            document, operation, query_hash, variables, operation_name
+        )
+        result = await aget_fresh(cache_key, self.cache_refresh_beta)
+        if result is MISSING:
+            return None
+        if not self.prepare_hit(request, document, operation, variables):
+            return None
+        await arecord_request(
+            request, self.warm_body(request, query, variables, operation_name)
+        )
+        body = self.json_encode(request, {"data": result.data})
+        return HttpResponse(body, content_type="application/json")
+
+    def execute_graphql_request(
+        self, request, data, query, variables, operation_name, show_graphiql=False
+    ):
+        execute = super().execute_graphql_request
+        args = (request, data, query, variables, operation_name, show_graphiql)
+        caching = getattr(settings, "GRAPHQL_CACHING", False)
+        if not query or show_graphiql or not caching:
+            return execute(*args)
+
+        document, errors = self.get_document(request, query)
+        if errors:
+            return execute(*args)
+        operation = get_operation_ast(document, operation_name)
+        if operation is None or operation.operation != OperationType.QUERY:
+            return execute(*args)
+
+        query_hash = getattr(request, "query_hash", None) or document_hash(query)
+        cache_key = self.get_cache_key(
+            document, operation, query_hash, variables, operation_name
+        )
+        body = self.warm_body(request, query, variables, operation_name)
+        record_request(request, body)
+        soft_ttl, hard_ttl = resolve_ttl(self.cache_ttl_setting, self.cache_timeout)
+        return get_or_compute(
+            cache_key,
+            lambda: execute(*args),
+            soft_ttl=soft_ttl,
+            hard_ttl=hard_ttl,
+            lock_timeout=self.cache_lock_timeout,
+            lock_wait=self.cache_lock_wait,
+            beta=self.cache_refresh_beta,
+            cacheable=lambda result: result is not None and not result.errors,
+        )
+
+
+class PersistedQueryGraphQLView(
+    AsyncHitMixin, PersistedQueryMixin, QueryCostMixin, CachedGraphQLView
+):
+    """CachedGraphQLView with cost limits and automatic persisted queries
+
+    Cache hits are answered natively async under ASGI.
+    """
@@ -0,0 +1,123 @@
+import itertools
+import json
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from core.benchmarks import (
+    benchmark_environment,
+    clear_cache,
+    compare_results,
+    environment_info,
+    run_sequentially,
+    seed_events,
+)
+
+ALL_EVENTS = """
+query AllEvents($first: Int!) {
+  allEvents(first: $first) {
+    edges { node { id name startDate relatedLinks { type link } } }
+  }
+}
+"""
+EVENT_BY_NAME = """
+query EventByName($name: String!) {
+  eventByName(name: $name) { id name description relatedLinks { type link } }
+}
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput and p50/p99 latency of the REST and GraphQL "
+        "endpoints with cold and warm caches, and of write-then-read cycles"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300)
+        parser.add_argument("--events", type=int, default=500)
+        parser.add_argument("--links", type=int, default=2, help="Links per event")
+        parser.add_argument(
+            "--sample", type=int, default=50, help="Distinct events read in turn"
+        )
+        parser.add_argument(
+            "--redis",
+            action="store_true",
+            help="Use the configured cache, under a key prefix of its own",
+        )
+        parser.add_argument("--output", help="Also write the JSON results here")
+        parser.add_argument("--compare", help="JSON results of a baseline run")
+
+    def handle(self, *args, **options):
+        with benchmark_environment(locmem=not options["redis"]):
+            events = seed_events(options["events"], options["links"])
+            self.client = Client()
+            self.sample = events[: options["sample"]]
+            report = {
+                "environment": environment_info(
+                    events=options["events"],
+                    links=options["links"],
+                    requests=options["requests"],
+                ),
+                "results": self.run_scenarios(options["requests"]),
+            }
+
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                baseline = json.load(file)["results"]
+            report["comparison"] = compare_results(report["results"], baseline)
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def run_scenarios(self, total):
+        results = {}
+        for name, send in self.read_scenarios().items():
+            results[f"{name}_cold"] = run_sequentially(send, total, before=clear_cache)
+            clear_cache()
+            for _ in self.sample:
+                send()  # every event of the sample is cached
+            results[f"{name}_warm"] = run_sequentially(send, total)
+        results["write_invalidate"] = run_sequentially(self.write_cycle(), total)
+        return results
+
+    def read_scenarios(self):
+        details = itertools.cycle(self.sample)
+        names = itertools.cycle(self.sample)
+        return {
+            "list": lambda: self.client.get("/api/events/"),
+            "detail": lambda: self.client.get(f"/api/events/{next(details).pk}/"),
+            "all_events": lambda: self.graphql(ALL_EVENTS, {"first": 50}),
+            "event_by_name": lambda: self.graphql(
+                EVENT_BY_NAME, {"name": next(names).name}
+            ),
+        }
+
+    def write_cycle(self):
+        """PATCH an event, then read the list and detail it invalidated"""
+        events = itertools.cycle(self.sample)
+        counter = itertools.count()
+
+        def cycle():
+            url = f"/api/events/{next(events).pk}/"
+            response = self.client.patch(
+                url,
+                {"description": f"Revision {next(counter)}"},
+                content_type="application/json",
+            )
+            if response.status_code >= 400:
+                return response
+            self.client.get("/api/events/")
+            return self.client.get(url)
+
+        return cycle
+
+    def graphql(self, query, variables):
+        return self.client.post(
+            "/api/graphql/",
+            {"query": query, "variables": variables},
+            content_type="application/json",
+        )
@@ -0,0 +1,57 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient
+from django.test.utils import override_settings
+
+from core.benchmarks import benchmark_environment, run_concurrently, seed_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare cache-hit throughput of the native async views with the "
+        "sync views they fall back to, through the in-process ASGI handler"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--events", type=int, default=200)
+        parser.add_argument(
+            "--locmem", action="store_true", help="Use an in-process cache, no Redis"
+        )
+        parser.add_argument("--output", help="Also write the JSON results here")
+
+    def handle(self, *args, **options):
+        with benchmark_environment(locmem=options["locmem"]):
+            event = seed_events(options["events"])[0]
+            scenarios = {
+                "detail": lambda client: client.get(f"/api/events/{event.pk}/"),
+                "list": lambda client: client.get("/api/events/"),
+                "graphql": lambda client: client.post(
+                    "/api/graphql/",
+                    {"query": "{ allEvents(first: 50) { edges { node { name } } } }"},
+                    content_type="application/json",
+                ),
+            }
+            results = {}
+            for name, send in scenarios.items():
+                for mode, enabled in (("async", True), ("sync", False)):
+                    with override_settings(ASYNC_CACHE_HITS=enabled):
+                        results[f"{name}_{mode}"] = asyncio.run(
+                            self.measure(send, options)
+                        )
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    async def measure(self, send, options):
+        client = AsyncClient()
+        await send(client)  # warm the cache
+        return await run_concurrently(
+            lambda: send(client), options["requests"], options["concurrency"]
+        )
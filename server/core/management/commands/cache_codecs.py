@@ -0,0 +1,107 @@
+import json
+
+from django.core.cache import cache, caches
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import override_settings
+
+from core.benchmarks import (
+    benchmark_environment,
+    clear_cache,
+    measure_codec,
+    seed_events,
+)
+from core.cache.codecs import available_codecs
+from core.cache.stampede import CacheEntry
+from core.metrics import cache_namespace
+
+from .bench import ALL_EVENTS, EVENT_BY_NAME
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the caches with real responses, then measure every available "
+        "codec per key namespace. The recommended codec has the lowest "
+        "decode plus transfer time per hit, a suggestion for CACHE_CODECS"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=500)
+        parser.add_argument("--links", type=int, default=2, help="Links per event")
+        parser.add_argument("--sample", type=int, default=50)
+        parser.add_argument("--rounds", type=int, default=20)
+        parser.add_argument("--min-size", type=int, default=1024)
+        parser.add_argument(
+            "--bandwidth",
+            type=float,
+            default=125.0,
+            help="MB/s between the app and Redis, to weigh bytes against CPU",
+        )
+        parser.add_argument(
+            "--redis",
+            action="store_true",
+            help="Use the configured cache, under a key prefix of its own",
+        )
+        parser.add_argument("--output", help="Also write the JSON results here")
+
+    def handle(self, *args, **options):
+        with (
+            benchmark_environment(locmem=not options["redis"]),
+            override_settings(CACHE_CODECS={}),  # sample the raw values
+        ):
+            clear_cache()
+            events = seed_events(options["events"], options["links"])
+            self.fill(events[: options["sample"]])
+            namespaces = self.cached_values()
+
+        report = {}
+        for namespace, values in sorted(namespaces.items()):
+            results = {}
+            for codec in available_codecs(options["min_size"]):
+                result = measure_codec(codec, values, options["rounds"])
+                transfer_us = result["bytes"] / len(values) / options["bandwidth"]
+                result["hit_us"] = round(result["loads_us"] + transfer_us, 2)
+                results[codec.name] = result
+            report[namespace] = {
+                "entries": len(values),
+                "codecs": results,
+                "recommended": min(results, key=lambda name: results[name]["hit_us"]),
+            }
+
+        output = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output)
+        self.stdout.write(output)
+
+    def fill(self, events):
+        client = Client()
+        client.get("/api/events/")
+        client.get("/api/events/?page_size=100")
+        for event in events:
+            client.get(f"/api/events/{event.pk}/")
+            client.post(
+                "/api/graphql/",
+                {"query": EVENT_BY_NAME, "variables": {"name": event.name}},
+                content_type="application/json",
+            )
+        for first in (10, 50, 100):
+            client.post(
+                "/api/graphql/",
+                {"query": ALL_EVENTS, "variables": {"first": first}},
+                content_type="application/json",
+            )
+
+    def cached_values(self):
+        """Values of the ``get_or_compute`` entries in the cache, by namespace"""
+        backend = caches["default"]
+        if hasattr(backend, "iter_keys"):  # django-redis
+            keys = list(backend.iter_keys("*"))
+        else:  # locmem keys are made as "<prefix>:<version>:<key>"
+            keys = [key.split(":", 2)[2] for key in list(backend._cache)]
+        namespaces = {}
+        for key, entry in cache.get_many(keys).items():
+            if isinstance(entry, CacheEntry):
+                namespace = cache_namespace(key)
+                namespaces.setdefault(namespace, []).append(entry.load())
+        return namespaces
@@ -0,0 +1,118 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core.cache.warming import top_requests, warm_settings
+from event.models import Event
+
+
+def get(path):
+    return {"method": "GET", "path": path, "body": None}
+
+
+def replay(recipes, host):
+    """Send each recipe once, returning the status codes
+
+    View exceptions come back as 500 responses, counted as failed.
+    """
+    client = Client(
+        HTTP_HOST=host, HTTP_X_CACHE_WARM="1", raise_request_exception=False
+    )
+    try:
+        statuses = []
+        for recipe in recipes:
+            if recipe["method"] == "POST":
+                response = client.post(
+                    recipe["path"], recipe["body"], content_type="application/json"
+                )
+            else:
+                response = client.get(recipe["path"])
+            statuses.append(response.status_code)
+        return statuses
+    finally:
+        connections.close_all()  # this thread's connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute the hottest list, detail and GraphQL cache entries by "
+        "replaying their requests in parallel batches"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--details", type=int, default=100, help="Upcoming events to cache"
+        )
+        parser.add_argument(
+            "--partitions",
+            type=int,
+            default=10,
+            help="Most common segments and locations whose lists are cached",
+        )
+        parser.add_argument(
+            "--recorded",
+            type=int,
+            default=0,
+            help="Hottest requests recorded with WARM_CACHE['RECORD'] to replay",
+        )
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--host", default="localhost")
+
+    def handle(self, *args, **options):
+        recipes = self.recipes(options)
+        size = max(1, options["batch_size"])
+        batches = [recipes[i : i + size] for i in range(0, len(recipes), size)]
+        workers = max(1, min(options["concurrency"], len(batches)))
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(replay, batches, [options["host"]] * len(batches))
+            statuses = [status for batch in results for status in batch]
+        report = {
+            "requests": len(recipes),
+            "failed": sum(status >= 400 for status in statuses),
+            "batches": len(batches),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def recipes(self, options):
+        """Requests to replay, without duplicates, most valuable first"""
+        list_path = reverse("event-list-create")
+        recipes = [get(list_path)]
+        for field in Event.cache_partitions:
+            rows = (
+                Event.objects.exclude(**{field: ""})
+                .values(field)
+                .annotate(rows=Count("pk"))
+                .order_by("-rows", field)[: options["partitions"]]
+            )
+            recipes += [
+                get(f"{list_path}?{urlencode({field: row[field]})}") for row in rows
+            ]
+        upcoming = Event.objects.filter(end_date__gte=timezone.now()).order_by(
+            "start_date", "id"
+        )
+        recipes += [
+            get(reverse("event-detail", args=[pk]))
+            for pk in upcoming.values_list("pk", flat=True)[: options["details"]]
+        ]
+        graphql_path = reverse("graphql")
+        recipes += [
+            {"method": "POST", "path": graphql_path, "body": body}
+            for body in warm_settings()["QUERIES"]
+        ]
+        recipes += top_requests(options["recorded"])
+
+        unique = {}
+        for recipe in recipes:
+            unique.setdefault(json.dumps(recipe, sort_keys=True), recipe)
+        return list(unique.values())
@@ -0,0 +1,286 @@
+# core/metrics.py
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DURATION_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def metrics_enabled():
+    return getattr(settings, "METRICS_ENABLED", True)
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter per label values, passed positionally to ``inc``"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, self.labelnames, labels, value
+
+
+class Histogram(Counter):
+    """Observations bucketed per label values, with their sum and count"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def value(self, *labels):
+        """``(sum, count)`` of the observations"""
+        state = self._values.get(labels)
+        return (0, 0) if state is None else (state[1], state[2])
+
+    def samples(self):
+        with self._lock:
+            items = [
+                (labels, list(counts), total, count)
+                for labels, (counts, total, count) in self._values.items()
+            ]
+        names = (*self.labelnames, "le")
+        for labels, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket
+                yield f"{self.name}_bucket", names, (*labels, bound), cumulative
+            yield f"{self.name}_sum", self.labelnames, labels, total
+            yield f"{self.name}_count", self.labelnames, labels, count
+
+
+class CallbackMetric:
+    """Metric read at scrape time from ``collect()``, a labels -> value dict
+
+    For numbers another component already keeps, such as the document
+    cache's ``info()``.
+    """
+
+    def __init__(self, name, documentation, collect, kind="gauge", labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+
+    def clear(self):
+        pass
+
+    def samples(self):
+        for labels, value in self.collect().items():
+            yield self.name, self.labelnames, labels, value
+
+
+class Registry:
+    """Process-wide metrics rendered in the Prometheus text format
+
+    Counters live in each worker's memory: scrape every worker, or let the
+    aggregation happen in Prometheus.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def clear(self):
+        for metric in self.metrics.values():
+            metric.clear()
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labelnames, labels, value in metric.samples():
+                labels = _format_labels(labelnames, labels)
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(
+    Counter(
+        "http_requests_total",
+        "Requests served, per endpoint route, method and status.",
+        ("endpoint", "method", "status"),
+    )
+)
+HTTP_REQUEST_SECONDS = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time to produce the response, per endpoint route.",
+        ("endpoint",),
+    )
+)
+HTTP_REQUEST_CACHE_SECONDS = registry.register(
+    Histogram(
+        "http_request_cache_seconds",
+        "Time spent in cache calls while serving a request.",
+        ("endpoint",),
+    )
+)
+HTTP_REQUEST_DB_SECONDS = registry.register(
+    Histogram(
+        "http_request_db_seconds",
+        "Time spent in SQL queries while serving a request.",
+        ("endpoint",),
+    )
+)
+HTTP_REQUEST_DB_QUERIES = registry.register(
+    Histogram(
+        "http_request_db_queries",
+        "SQL queries run while serving a request.",
+        ("endpoint",),
+        COUNT_BUCKETS,
+    )
+)
+HTTP_RESPONSE_BYTES = registry.register(
+    Histogram(
+        "http_response_size_bytes",
+        "Size of non-streaming response bodies.",
+        ("endpoint",),
+        SIZE_BUCKETS,
+    )
+)
+CACHE_LOOKUPS = registry.register(
+    Counter(
+        "cache_lookups_total",
+        "Cache reads per key namespace, layer (local or shared) and result.",
+        ("namespace", "layer", "result"),
+    )
+)
+CACHE_OPERATION_SECONDS = registry.register(
+    Histogram(
+        "cache_operation_seconds",
+        "Duration of cache backend calls, per operation and key namespace.",
+        ("operation", "namespace"),
+    )
+)
+CACHE_ENTRY_BYTES = registry.register(
+    Histogram(
+        "cache_entry_size_bytes",
+        "Size of cache entries encoded by a CACHE_CODECS codec, per namespace.",
+        ("namespace",),
+        SIZE_BUCKETS,
+    )
+)
+CACHE_INVALIDATED_ROWS = registry.register(
+    Counter(
+        "cache_invalidated_rows_total",
+        "Rows whose cache entries were invalidated after a write, per model.",
+        ("model",),
+    )
+)
+
+
+def cache_namespace(key):
+    """Namespace of a cache key (``event_detail:<digest>`` -> ``event_detail``)
+
+    For calls on several keys the first one is used: the keys of one call
+    share a namespace in this codebase.
+    """
+    if isinstance(key, (dict, list, tuple, set)):
+        key = next(iter(key), "")
+    return str(key).partition(":")[0]
+
+
+def record_lookup(key, result, layer="shared"):
+    """Count a cache read as ``hit``, ``stale`` or ``miss``"""
+    CACHE_LOOKUPS.inc(cache_namespace(key), layer, result)
+
+
+class RequestStats:
+    """Time and queries charged to the request being served"""
+
+    __slots__ = ("cache_seconds", "db_seconds", "db_queries")
+
+    def __init__(self):
+        self.cache_seconds = 0.0
+        self.db_seconds = 0.0
+        self.db_queries = 0
+
+
+# Context variables follow the request into sync_to_async/async_to_sync
+# threads, so the same RequestStats is charged on either side.
+request_stats = ContextVar("request_stats", default=None)
+
+
+def record_cache_call(operation, key, seconds):
+    CACHE_OPERATION_SECONDS.observe(seconds, operation, cache_namespace(key))
+    if (stats := request_stats.get()) is not None:
+        stats.cache_seconds += seconds
+
+
+def query_timer(execute, sql, params, many, context):
+    """Execute wrapper charging each query to the current request"""
+    if (stats := request_stats.get()) is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_seconds += time.perf_counter() - started
+        stats.db_queries += 1
+
+
+def instrument_connection(sender=None, connection=None, **kwargs):
+    """``connection_created`` receiver installing ``query_timer`` once"""
+    if query_timer not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_timer)
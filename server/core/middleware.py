@@ -0,0 +1,78 @@
+# core/middleware.py
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import (
+    HTTP_REQUEST_CACHE_SECONDS,
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_DB_SECONDS,
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS,
+    HTTP_RESPONSE_BYTES,
+    RequestStats,
+    metrics_enabled,
+    request_stats,
+)
+
+
+def request_endpoint(request):
+    """Route pattern of the request, bounded unlike the raw path"""
+    match = getattr(request, "resolver_match", None)
+    return match.route if match is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """Record per-endpoint latency, cache and SQL time, queries and sizes
+
+    Put it first so the timings cover the other middleware. Works on both
+    the sync and the async request path, so async cache hits stay async.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = metrics_enabled()
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        stats, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        stats, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            request_stats.reset(token)
+        self.record(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def start(self):
+        stats = RequestStats()
+        return stats, request_stats.set(stats), time.perf_counter()
+
+    def record(self, request, response, stats, elapsed):
+        endpoint = request_endpoint(request)
+        HTTP_REQUESTS.inc(endpoint, request.method, str(response.status_code))
+        HTTP_REQUEST_SECONDS.observe(elapsed, endpoint)
+        HTTP_REQUEST_CACHE_SECONDS.observe(stats.cache_seconds, endpoint)
+        HTTP_REQUEST_DB_SECONDS.observe(stats.db_seconds, endpoint)
+        HTTP_REQUEST_DB_QUERIES.observe(stats.db_queries, endpoint)
+        if not response.streaming:
+            HTTP_RESPONSE_BYTES.observe(len(response.content), endpoint)
@@ -0,0 +1,138 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a unique compound ordering such as (start_date, id)
+
+    Each page is fetched with a range condition on the ordering columns
+    instead of an OFFSET, so with a matching composite index a deep page
+    costs the same as the first one. Links are path-relative so cached
+    pages do not depend on the host of the request that filled them.
+    """
+
+    ordering = ("start_date", "id")
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor["r"] if cursor else False
+
+        try:
+            rows, has_more = self.fetch(
+                queryset, cursor["p"] if cursor else None, reverse, page_size
+            )
+        except (ValidationError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        came_from = cursor is not None
+        self.has_next = bool(rows) and (came_from if reverse else has_more)
+        self.has_previous = bool(rows) and (has_more if reverse else came_from)
+        self.first, self.last = (rows[0], rows[-1]) if rows else (None, None)
+        return rows
+
+    def fetch(self, queryset, position, reverse, page_size):
+        """Up to ``page_size`` rows after ``position``, and whether more exist
+
+        Rows are returned in forward order even when walking backwards.
+        """
+        queryset = queryset.order_by(
+            *(f"-{field}" if reverse else field for field in self.ordering)
+        )
+        if position is not None:
+            queryset = queryset.filter(self.beyond(position, reverse))
+        rows = list(queryset[: page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+        return rows, has_more
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def beyond(self, position, reverse):
+        """Rows strictly after ``position`` in (reverse) ordering order"""
+        lookup, bound = ("lt", "lte") if reverse else ("gt", "gte")
+        leading = self.ordering[0]
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            equal = {name: position[i] for i, name in enumerate(self.ordering[:index])}
+            condition |= Q(**equal, **{f"{field}__{lookup}": position[index]})
+        # Redundant bound on the leading column keeps it an index range scan
+        return Q(**{f"{leading}__{bound}": position[0]}) & condition
+
+    def get_position(self, instance):
+        values = (getattr(instance, field) for field in self.ordering)
+        return [
+            value.isoformat() if hasattr(value, "isoformat") else str(value)
+            for value in values
+        ]
+
+    def encode_position(self, instance, reverse=False):
+        payload = json.dumps({"p": self.get_position(instance), "r": reverse})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_position(self, encoded):
+        """Inverse of ``encode_position``; raises ValueError when malformed"""
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if not isinstance(cursor, dict) or not isinstance(cursor["p"], list):
+                raise ValueError
+            if len(cursor["p"]) != len(self.ordering):
+                raise ValueError
+            cursor["r"] = bool(cursor["r"])
+        except (binascii.Error, KeyError, TypeError, ValueError):
+            raise ValueError(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, instance, reverse):
+        cursor = self.encode_position(instance, reverse)
+        url = self.request.get_full_path()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            return self.decode_position(encoded)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.first, reverse=True)
@@ -0,0 +1,84 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from rest_framework import serializers
+
+from core.cache.invalidation import queue_invalidation
+
+
+def parse_pks(model, values):
+    """Valid primary keys among ``values``, malformed ones are dropped"""
+    pks = []
+    for value in values:
+        try:
+            pks.append(model._meta.pk.to_python(value))
+        except DjangoValidationError:
+            continue
+    return pks
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Writes a whole list with one bulk_create or bulk_update
+
+    Each item is validated by the child serializer as usual. Rows are then
+    written in batches of ``batch_size`` inside one transaction, and caches
+    are invalidated once for the batch after the commit (bulk writes send
+    no model signals, so it is queued explicitly). For updates, pass the
+    target rows as ``instance`` and identify each item by its primary key.
+    """
+
+    batch_size = 500
+
+    @property
+    def model(self):
+        return self.child.Meta.model
+
+    def run_child_validation(self, data):
+        if self.instance is None:
+            return super().run_child_validation(data)
+
+        pk_name = self.model._meta.pk.name
+        pk = data.get(pk_name) if isinstance(data, dict) else None
+        if getattr(self, "_targets", None) is None:
+            self._targets = {instance.pk: instance for instance in self.instance}
+        pks = parse_pks(self.model, [pk]) if pk is not None else []
+        if not pks or pks[0] not in self._targets:
+            raise serializers.ValidationError({pk_name: ["Not found."]})
+        self.child.instance = self._targets[pks[0]]
+        self.child.initial_data = data
+        return {**super().run_child_validation(data), pk_name: pks[0]}
+
+    def create(self, validated_data):
+        instances = [self.model(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            self.model.objects.bulk_create(instances, batch_size=self.batch_size)
+            queue_invalidation(self.model, instances, created=True)
+        return instances
+
+    def update(self, instances, validated_data):
+        pk_name = self.model._meta.pk.name
+        targets = {instance.pk: instance for instance in instances}
+        auto_now = [
+            field
+            for field in self.model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+        ]
+        fields = {field.name for field in auto_now}
+        updated = {}
+        for attrs in validated_data:
+            attrs = dict(attrs)
+            instance = targets[attrs.pop(pk_name)]
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+            fields.update(attrs)
+            updated[instance.pk] = instance
+        for instance in updated.values():
+            for field in auto_now:
+                field.pre_save(instance, add=False)
+
+        updated = list(updated.values())
+        with transaction.atomic():
+            self.model.objects.bulk_update(
+                updated, sorted(fields), batch_size=self.batch_size
+            )
+            queue_invalidation(self.model, updated)
+        return updated
@@ -0,0 +1,36 @@
+import csv
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+class Echo:
+    """File-like object whose write() returns the line, for csv.writer"""
+
+    def write(self, value):
+        return value
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def stream_ndjson(fields, rows, batch_size=500):
+    """Yield one JSON object per row, ``batch_size`` rows per chunk"""
+    encoder = DjangoJSONEncoder(separators=(",", ":"))
+    for batch in batched(rows, batch_size):
+        yield "".join(encoder.encode(dict(zip(fields, row))) + "\n" for row in batch)
+
+
+def csv_value(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def stream_csv(fields, rows, batch_size=500):
+    """Yield a header line and then ``batch_size`` CSV rows per chunk"""
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for batch in batched(rows, batch_size):
+        yield "".join(writer.writerow(map(csv_value, row)) for row in batch)
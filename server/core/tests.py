@@ -1,3 +1,328 @@
-from django.test import TestCase
+import queue
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.http import QueryDict
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core.cache.keys import (
+    build_cache_key,
+    bump_generation,
+    get_generation,
+    normalize_params,
+)
+from core.cache.local import MISSING, InvalidationBus, LocalLRUCache
+from core.cache.tags import invalidate_tags, tagged_cache_key
+from core.cache.stampede import CacheEntry, get_or_compute, lock_key, resolve_ttl
+from core.benchmarks import benchmark_caches, compare_results, summarize
+from core.cache.codecs import Codec
+from core.metrics import (
+    CACHE_ENTRY_BYTES,
+    CACHE_LOOKUPS,
+    CACHE_OPERATION_SECONDS,
+    Counter,
+    Histogram,
+    Registry,
+)
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+class FakePubSub:
+    def __init__(self, server):
+        self.server = server
+        self.messages = queue.Queue()
+
+    def subscribe(self, channel):
+        self.server.subscribers.setdefault(channel, []).append(self.messages)
+
+    def get_message(self, timeout=0.0):
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        pass
+
+
+class FakeRedis:
+    """Just enough of redis-py's pub/sub API to stand in for a server"""
+
+    def __init__(self):
+        self.subscribers = {}
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        return FakePubSub(self)
+
+    def publish(self, channel, data):
+        for messages in self.subscribers.get(channel, []):
+            messages.put({"type": "message", "channel": channel, "data": data})
+        return len(self.subscribers.get(channel, []))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class GenerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generation_is_stable_until_bumped(self):
+        first = get_generation("event_list")
+        self.assertEqual(get_generation("event_list"), first)
+        self.assertEqual(bump_generation("event_list"), first + 1)
+        self.assertEqual(get_generation("event_list"), first + 1)
+
+    def test_bump_seeds_missing_counter(self):
+        generation = bump_generation("event_list")
+        self.assertEqual(get_generation("event_list"), generation)
+
+
+class CacheKeyTests(SimpleTestCase):
+    def test_param_order_and_defaults_do_not_change_key(self):
+        first = QueryDict("segment=Web&tag=b&tag=a&location=")
+        second = QueryDict("tag=a&format=json&segment=Web&tag=b&ordering=name")
+        self.assertEqual(
+            build_cache_key("event_list", params=first),
+            build_cache_key(
+                "event_list",
+                params=second,
+                ignore=("format",),
+                defaults={"ordering": "name"},
+            ),
+        )
+
+    def test_multi_value_params_are_kept(self):
+        self.assertEqual(
+            normalize_params(QueryDict("tag=b&tag=a")), [["tag", ["a", "b"]]]
+        )
+
+    def test_key_is_a_stable_digest(self):
+        key = build_cache_key("gql", "default", {"b": 1, "a": 2}, "{ allEvents }")
+        self.assertEqual(
+            key, build_cache_key("gql", "default", {"a": 2, "b": 1}, "{ allEvents }")
+        )
+        self.assertRegex(key, r"^gql:[0-9a-f]{32}$")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StampedeTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_miss_computes_and_stores(self):
+        compute = mock.Mock(return_value=["a"])
+        for _ in range(3):
+            self.assertEqual(get_or_compute("k", compute, 60, 120), ["a"])
+        compute.assert_called_once()
+
+    def test_stale_value_is_served_while_locked(self):
+        cache.set("k", CacheEntry(value="old", soft_expires=time.time() - 1, delta=0))
+        cache.add(lock_key("k"), "other-worker")
+        compute = mock.Mock(return_value="new")
+        self.assertEqual(get_or_compute("k", compute, 60, 120, beta=0), "old")
+        compute.assert_not_called()
+
+    def test_stale_value_is_refreshed_by_lock_holder(self):
+        cache.set("k", CacheEntry(value="old", soft_expires=time.time() - 1, delta=0))
+        self.assertEqual(get_or_compute("k", lambda: "new", 60, 120), "new")
+        self.assertIsNone(cache.get(lock_key("k")))
+
+    def test_cold_miss_waits_for_lock_holder(self):
+        cache.add(lock_key("k"), "other-worker")
+        entry = CacheEntry(value="filled", soft_expires=time.time() + 60, delta=0)
+        compute = mock.Mock()
+        with mock.patch("core.cache.stampede.time.sleep", lambda _: cache.set("k", entry)):
+            self.assertEqual(get_or_compute("k", compute, 60, 120), "filled")
+        compute.assert_not_called()
+
+    @override_settings(CACHE_TTL={"A": 10, "B": {"SOFT": 5, "HARD": 50}})
+    def test_resolve_ttl(self):
+        self.assertEqual(resolve_ttl("A", 1), (10, 10))
+        self.assertEqual(resolve_ttl("B", 1), (5, 50))
+        self.assertEqual(resolve_ttl("C", 1), (1, 1))
+
+
+class LocalLRUCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        local = LocalLRUCache(max_size=2, ttl=60)
+        local.set("a", 1)
+        local.set("b", 2)
+        local.get("a")
+        local.set("c", 3)
+        self.assertEqual(local.get("b"), MISSING)
+        self.assertEqual((local.get("a"), local.get("c")), (1, 3))
+
+    def test_entries_expire(self):
+        local = LocalLRUCache(ttl=0)
+        local.set("a", 1)
+        self.assertEqual(local.get("a"), MISSING)
+        self.assertEqual(len(local), 0)
+
+
+class InvalidationBusTests(SimpleTestCase):
+    def setUp(self):
+        server = FakeRedis()
+        self.workers = []
+        for _ in range(2):
+            local = LocalLRUCache(ttl=60)
+            bus = InvalidationBus(local, "cache:invalidate", lambda: server, 0.01)
+            self.addCleanup(bus.stop)
+            self.workers.append((local, bus))
+
+    def wait_for_subscribers(self):
+        for _, bus in self.workers:
+            bus.start()
+        server = self.workers[0][1].client_factory()
+        while len(server.subscribers.get("cache:invalidate", [])) < 2:
+            time.sleep(0.001)
+
+    def test_publish_evicts_key_on_every_worker(self):
+        self.wait_for_subscribers()
+        for local, _ in self.workers:
+            local.set("event_detail:1", "cached")
+            local.set("event_detail:2", "cached")
+
+        self.workers[0][1].publish(["event_detail:1"])
+
+        other = self.workers[1][0]
+        deadline = time.monotonic() + 2
+        while other.get("event_detail:1") is not MISSING:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.001)
+        self.assertEqual(self.workers[0][0].get("event_detail:1"), MISSING)
+        self.assertEqual(other.get("event_detail:2"), "cached")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TagTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidating_a_tag_changes_dependent_keys_only(self):
+        both = tagged_cache_key("gql", ["event.event", "event.link"], "q")
+        events = tagged_cache_key("gql", ["event.event"], "q")
+        swapped = tagged_cache_key("gql", ["event.link", "event.event"], "q")
+        self.assertEqual(both, swapped)
+
+        invalidate_tags(["event.link"])
+        self.assertNotEqual(
+            tagged_cache_key("gql", ["event.event", "event.link"], "q"), both
+        )
+        self.assertEqual(tagged_cache_key("gql", ["event.event"], "q"), events)
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "core.cache.backends.InstrumentedLocMemCache"}
+    }
+)
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        CACHE_LOOKUPS.clear()
+        CACHE_OPERATION_SECONDS.clear()
+
+    def test_render_prometheus_text(self):
+        registry = Registry()
+        requests = registry.register(Counter("requests_total", "Requests.", ["path"]))
+        sizes = registry.register(Histogram("size", "Sizes.", buckets=(10, 100)))
+        requests.inc('/a"b')
+        requests.inc('/a"b', amount=2)
+        for value in (5, 50, 500):
+            sizes.observe(value)
+        lines = registry.render().splitlines()
+        self.assertIn("# TYPE requests_total counter", lines)
+        self.assertIn('requests_total{path="/a\\"b"} 3', lines)
+        self.assertIn('size_bucket{le="10"} 1', lines)
+        self.assertIn('size_bucket{le="100"} 2', lines)
+        self.assertIn('size_bucket{le="+Inf"} 3', lines)
+        self.assertIn("size_sum 555", lines)
+        self.assertIn("size_count 3", lines)
+
+    def test_get_or_compute_counts_hits_misses_and_stale_reads(self):
+        get_or_compute("ns:k", lambda: "a", 60, 120)
+        get_or_compute("ns:k", lambda: "a", 60, 120, beta=0)
+        cache.set("ns:k", CacheEntry(value="a", soft_expires=time.time() - 1, delta=0))
+        get_or_compute("ns:k", lambda: "b", 60, 120)
+        for result in ("miss", "hit", "stale"):
+            self.assertEqual(CACHE_LOOKUPS.value("ns", "shared", result), 1)
+
+    def test_backend_calls_are_timed_per_namespace(self):
+        cache.set("event_detail:1", "a")
+        cache.get("event_detail:1")
+        cache.get_many(["event_detail:1", "event_detail:2"])  # one get per key
+        self.assertEqual(CACHE_OPERATION_SECONDS.value("set", "event_detail")[1], 1)
+        self.assertEqual(CACHE_OPERATION_SECONDS.value("get", "event_detail")[1], 3)
+
+
+class BenchmarkReportTests(SimpleTestCase):
+    def test_summarize_and_compare(self):
+        current = {"list": summarize([0.001] * 99 + [0.1], 0.2)}
+        self.assertEqual(current["list"]["p50_ms"], 1.0)
+        self.assertEqual(current["list"]["p99_ms"], 100.0)
+        self.assertEqual(current["list"]["rps"], 500.0)
+        baseline = {"list": {"rps": 250.0, "p50_ms": 2.0, "p99_ms": 100.0}}
+        self.assertEqual(
+            compare_results({**current, "new": current["list"]}, baseline),
+            {"list": {"rps": 2.0, "p50_ms": 0.5, "p99_ms": 1.0}},
+        )
+
+    @override_settings(
+        CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"},
+            "other": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+                "KEY_PREFIX": "app",
+            },
+        }
+    )
+    def test_configured_caches_get_their_own_prefix(self):
+        caches = benchmark_caches()
+        self.assertEqual(caches["default"]["KEY_PREFIX"], "bench")
+        self.assertEqual(caches["other"]["KEY_PREFIX"], "app:bench")
+        self.assertEqual(benchmark_caches(locmem=True), LOCMEM_CACHES)
+
+
+class CodecTests(SimpleTestCase):
+    def test_json_values_round_trip(self):
+        value = {"results": [{"id": "a", "n": 1}] * 100, "next": None}
+        codecs = [Codec("orjson"), Codec("orjson", "zlib"), Codec("pickle", "zlib")]
+        for codec in codecs:
+            self.assertEqual(Codec.loads(codec.dumps(value)), value)
+
+    def test_other_values_fall_back_to_pickle(self):
+        entry = CacheEntry(value=b"body", soft_expires=1.0, delta=0.0)
+        payload = Codec("orjson").dumps(entry)
+        self.assertEqual(payload[:1], b"p")
+        self.assertEqual(Codec.loads(payload), entry)
+
+    def test_small_payloads_are_not_compressed(self):
+        codec = Codec("orjson", "zlib", min_size=100)
+        self.assertEqual(codec.dumps({"a": 1})[:2], b"j-")
+        self.assertEqual(codec.dumps({"a": "x" * 200})[:2], b"jz")
+
+    def test_unavailable_codec(self):
+        with self.assertRaises(ImproperlyConfigured):
+            Codec("nope")
+
+    @override_settings(
+        CACHES=LOCMEM_CACHES,
+        CACHE_CODECS={"ns": {"SERIALIZER": "orjson", "COMPRESSOR": "zlib"}},
+    )
+    def test_get_or_compute_encodes_configured_namespaces(self):
+        cache.clear()
+        CACHE_ENTRY_BYTES.clear()
+        value = {"results": list(range(1000))}
+        self.assertEqual(get_or_compute("ns:k", lambda: value, 60, 120), value)
+        entry = cache.get("ns:k")
+        self.assertTrue(entry.encoded)
+        self.assertLess(len(entry.value), len(str(value)))
+        self.assertEqual(get_or_compute("ns:k", lambda: None, 60, 120, beta=0), value)
+        self.assertEqual(CACHE_ENTRY_BYTES.value("ns")[1], 1)
+
+        get_or_compute("other:k", lambda: value, 60, 120)
+        self.assertFalse(cache.get("other:k").encoded)
@@ -1,3 +1,13 @@
-from django.shortcuts import render
+# core/views.py
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
 
-# Create your views here.
+from .metrics import CONTENT_TYPE, metrics_enabled, registry
+
+
+@require_GET
+def metrics(request):
+    """This worker's counters in the Prometheus text exposition format"""
+    if not metrics_enabled():
+        raise Http404
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
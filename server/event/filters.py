@@ -0,0 +1,47 @@
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+# query param -> queryset lookup
+EVENT_FILTERS = {
+    "segment": "segment",
+    "location": "location",
+    "starts_after": "start_date__gte",
+    "starts_before": "start_date__lt",
+    "ends_after": "end_date__gte",
+    "ends_before": "end_date__lt",
+}
+DATE_FILTERS = {"starts_after", "starts_before", "ends_after", "ends_before"}
+
+
+def parse_filter_datetime(name, value):
+    try:
+        parsed = value if isinstance(value, datetime) else parse_datetime(value)
+        if parsed is None and (day := parse_date(value)) is not None:
+            parsed = datetime.combine(day, time.min)
+    except ValueError:  # well formed but impossible, such as February 30
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: "Enter a valid date or date/time."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def get_event_filters(params):
+    """Queryset lookups for the event filters present in ``params``"""
+    lookups = {}
+    for name, lookup in EVENT_FILTERS.items():
+        value = params.get(name)
+        if value in (None, ""):
+            continue
+        if name in DATE_FILTERS:
+            value = parse_filter_datetime(name, value)
+        lookups[lookup] = value
+    return lookups
+
+
+def filter_events(queryset, params):
+    return queryset.filter(**get_event_filters(params))
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 08:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_date', 'id'], name='event_start_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event', '0002_event_start_date_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['name'], name='event_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_date', 'end_date'], name='event_start_end_date_idx'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 import uuid
 from django.db import models
 from core.cache.mixins import AutoInvalidateMixin
+from core.cache.partitions import PartitionedModelMixin
 from core.cache.signals import register_cache_invalidation
 from django.core.cache import cache
 
@@ -18,7 +19,7 @@ class Link(models.Model):
     )
 
 
-class Event(models.Model):
+class Event(PartitionedModelMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=120)
     description = models.CharField(max_length=320)
@@ -34,11 +35,27 @@ class Event(models.Model):
     )
     location = models.CharField(max_length=200, blank=True, default="Brasil")
 
+    # List caches are kept per segment and location filter
+    cache_partitions = ("segment", "location")
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the event list walks (start_date, id)
+            models.Index(fields=["start_date", "id"], name="event_start_date_id_idx"),
+            # eventByName lookups
+            models.Index(fields=["name"], name="event_name_idx"),
+            # Date range filters bounding both ends of an event
+            models.Index(
+                fields=["start_date", "end_date"], name="event_start_end_date_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.name} in {self.location}"
 
 
 AutoInvalidateMixin.register_model(Event)
+AutoInvalidateMixin.register_model(Link)
 
 # Only foi views implementation
 # def invalidate_caches(self):
@@ -1,54 +1,76 @@
-import hashlib
 import graphene
-import json
 from graphene_django.types import DjangoObjectType
-from .models import Event
-from django.core.cache import cache
+from graphql import GraphQLError
+from .models import Event, Link
+from .filters import get_event_filters
+from .serializers import EventSerializer
+from core.dataloaders import ForeignKeyLoader, ReverseRelationLoader, get_loaders
+from core.graphql.connection import keyset_connection
+from core.graphql.optimizer import get_joined, get_prefetched, optimize_queryset
 
 
-def generate_cache_key(operation_name, variables, query):
-    key_parts = [
-        "graphql",
-        operation_name or "default",
-        json.dumps(variables, sort_keys=True),
-        query,
-    ]
+class LinkType(DjangoObjectType):
+    class Meta:
+        model = Link
+        fields = "__all__"
 
-    key = hashlib.md5("".join(key_parts).encode()).hexdigest()
-    return f"gql_{key}"
+    def resolve_event(self, info):
+        if (event := get_joined(self, "event")) is not None:
+            return event
+        loader = get_loaders(info).loader(ForeignKeyLoader, Link, "event")
+        return loader.load(self.event_id)
 
 
 class EventType(DjangoObjectType):
+    related_links = graphene.List(graphene.NonNull(LinkType), required=True)
+
     class Meta:
         model = Event
         fields = "__all__"
 
+    def resolve_related_links(self, info):
+        if (links := get_prefetched(self, "related_links")) is not None:
+            return links
+        loader = get_loaders(info).loader(ReverseRelationLoader, Link, "event")
+        return loader.load(self.pk)
+
+
+class EventConnection(graphene.relay.Connection):
+    class Meta:
+        node = EventType
+
 
 class Query(graphene.ObjectType):
-    all_events = graphene.List(EventType)
+    all_events = graphene.relay.ConnectionField(
+        EventConnection,
+        segment=graphene.String(),
+        location=graphene.String(),
+        starts_after=graphene.DateTime(),
+        starts_before=graphene.DateTime(),
+        ends_after=graphene.DateTime(),
+        ends_before=graphene.DateTime(),
+    )
     event = graphene.Field(EventType, id=graphene.UUID(required=True))
     event_by_name = graphene.Field(EventType, name=graphene.String(required=True))
 
-    def resolve_all_events(self, info):
-        cache_key = generate_cache_key(
-            operation_name=info.operation.name.value if info.operation.name else None,
-            variables=info.variable_values,
-            query=info.field_nodes[0].loc.source.body,
+    def resolve_all_events(
+        self, info, first=None, last=None, after=None, before=None, **filters
+    ):
+        # Each page is cached per operation and variables by CachedGraphQLView
+        events = Event.objects.filter(**get_event_filters(filters))
+        connection = keyset_connection(
+            EventConnection, events, info, first, last, after, before
         )
-        cached_result = cache.get(cache_key)
-        if cached_result is not None:
-            print(f"Returned from cache with key: {cache_key}")
-            return cached_result
-
-        events = Event.objects.all()
-        cache.set(cache_key, events, timeout=60 * 15)
-        return events
+        get_loaders(info).track(edge.node for edge in connection.edges)
+        return connection
 
     def resolve_event(self, info, id):
-        return Event.objects.get(pk=id)
+        event = optimize_queryset(Event.objects.all(), info).get(pk=id)
+        return get_loaders(info).track([event])[0]
 
     def resolve_event_by_name(self, info, name):
-        return Event.objects.get(name=name)
+        event = optimize_queryset(Event.objects.all(), info).get(name=name)
+        return get_loaders(info).track([event])[0]
 
 
 class CreateEvent(graphene.Mutation):
@@ -75,8 +97,43 @@ class CreateEvent(graphene.Mutation):
         return CreateEvent(event=event)
 
 
+class EventInput(graphene.InputObjectType):
+    name = graphene.String(required=True)
+    description = graphene.String(required=True)
+    start_date = graphene.DateTime(required=True)
+    end_date = graphene.DateTime(required=True)
+    segment = graphene.String()
+    location = graphene.String()
+
+
+class BulkCreateEvents(graphene.Mutation):
+    """Validates every event, then inserts them with one bulk_create"""
+
+    max_batch_size = 1000
+
+    class Arguments:
+        events = graphene.List(graphene.NonNull(EventInput), required=True)
+
+    events = graphene.List(graphene.NonNull(EventType))
+
+    def mutate(self, info, events):
+        data = [
+            {name: value for name, value in event.items() if value is not None}
+            for event in events
+        ]
+        serializer = EventSerializer(
+            data=data, many=True, max_length=BulkCreateEvents.max_batch_size
+        )
+        if not serializer.is_valid():
+            raise GraphQLError(
+                "Invalid events.", extensions={"errors": serializer.errors}
+            )
+        return BulkCreateEvents(events=serializer.save())
+
+
 class Mutation(graphene.ObjectType):
     create_event = CreateEvent.Field()
+    bulk_create_events = BulkCreateEvents.Field()
 
 
 schema = graphene.Schema(query=Query, mutation=Mutation)
@@ -1,8 +1,11 @@
 from rest_framework import serializers
 from .models import Event
 
+from core.serializers import BulkListSerializer
+
 
 class EventSerializer(serializers.ModelSerializer):
     class Meta:
         model = Event
         fields = "__all__"
+        list_serializer_class = BulkListSerializer
@@ -1,3 +1,1162 @@
-from django.test import TestCase
+import asyncio
+import base64
+import hashlib
+import csv
+import io
+import json
+from concurrent.futures import Future
+from datetime import timedelta
+from types import ModuleType
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+import graphql
+
+from core.cache.conditional import modified_key
+from core.cache.keys import detail_cache_key
+from core.cache.stampede import lock_key
+from core.cache.tags import invalidate_tags
+from core.cache.warming import clear_recorded, top_requests
+from core.graphql.documents import DocumentCache
+from core.graphql.views import CachedGraphQLView, PersistedQueryGraphQLView
+from core.metrics import (
+    CACHE_LOOKUPS,
+    HTTP_REQUEST_CACHE_SECONDS,
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUESTS,
+    registry,
+)
+
+from .models import Event, Link
+from .views import EventDetailView, EventListCreateView
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+def create_event(**kwargs):
+    start = timezone.now() + timedelta(days=1)
+    defaults = {
+        "name": "PyCon",
+        "description": "Python conference",
+        "start_date": start,
+        "end_date": start + timedelta(days=2),
+    }
+    defaults.update(kwargs)
+    return Event.objects.create(**defaults)
+
+
+def nodes(connection):
+    return [edge["node"] for edge in connection["edges"]]
+
+
+def async_hit_urls():
+    """URLconf with the cached views built while ASYNC_CACHE_HITS is on
+
+    ``as_view`` reads the setting, so the project's views are sync here.
+    """
+    urlconf = ModuleType("event.async_hit_urls")
+    with override_settings(ASYNC_CACHE_HITS=True):
+        urlconf.urlpatterns = [
+            path("api/events/", EventListCreateView.as_view()),
+            path("api/events/<uuid:pk>/", EventDetailView.as_view()),
+            path("api/graphql/", csrf_exempt(PersistedQueryGraphQLView.as_view())),
+        ]
+    return urlconf
+
+
+ASYNC_HIT_URLS = async_hit_urls()
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EventViewCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.event = create_event()
+
+    def test_list_is_served_from_cache_until_a_write(self):
+        self.assertEqual(len(self.client.get("/api/events/").json()["results"]), 1)
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/events/")
+        self.assertEqual(len(response.json()["results"]), 1)
+
+        create_event(name="DjangoCon")
+        self.assertEqual(len(self.client.get("/api/events/").json()["results"]), 2)
+
+    def test_list_hit_skips_rendering(self):
+        first = self.client.get("/api/events/")
+        with mock.patch.object(JSONRenderer, "render") as render:
+            second = self.client.get("/api/events/")
+        render.assert_not_called()
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Type"], "application/json")
+        self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_browsable_api_is_not_served_rendered_json(self):
+        self.client.get("/api/events/")
+        response = self.client.get("/api/events/", HTTP_ACCEPT="text/html")
+        self.assertTrue(response["Content-Type"].startswith("text/html"))
+
+    def test_detail_is_served_from_cache_until_a_write(self):
+        url = f"/api/events/{self.event.pk}/"
+        self.assertEqual(self.client.get(url).json()["name"], "PyCon")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).json()["name"], "PyCon")
+
+        self.client.patch(url, {"name": "PyCon BR"}, format="json")
+        self.assertEqual(self.client.get(url).json()["name"], "PyCon BR")
+
+    def test_missing_detail_is_not_cached(self):
+        url = f"/api/events/{Event().pk}/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+@override_settings(
+    CACHES=LOCMEM_CACHES, ASYNC_CACHE_HITS=True, ROOT_URLCONF=ASYNC_HIT_URLS
+)
+class AsyncCacheHitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.event = create_event(name="PyCon")
+        self.detail = f"/api/events/{self.event.pk}/"
+        self.client.get(self.detail)
+        self.client.get("/api/events/")
+
+    async def test_hits_skip_the_sync_views(self):
+        with (
+            mock.patch.object(EventDetailView, "retrieve") as retrieve,
+            mock.patch.object(EventListCreateView, "list") as list_,
+        ):
+            detail = await self.async_client.get(self.detail)
+            listing = await self.async_client.get("/api/events/")
+        retrieve.assert_not_called()
+        list_.assert_not_called()
+        self.assertEqual(detail.json()["name"], "PyCon")
+        self.assertIn("ETag", detail)
+        self.assertEqual(listing.json()["results"][0]["name"], "PyCon")
+
+        etag = listing["ETag"]
+        response = await self.async_client.get(
+            "/api/events/", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_misses_and_writes_use_the_sync_views(self):
+        other = f"/api/events/{self.event.pk}/?page=1"
+        response = await self.async_client.get("/api/events/?segment=none")
+        self.assertEqual(response.json()["results"], [])
+        response = await self.async_client.patch(
+            self.detail, {"name": "DjangoCon"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.get(other)
+        self.assertEqual(response.json()["name"], "DjangoCon")
+
+    @override_settings(ASYNC_CACHE_HITS=False)
+    async def test_can_be_disabled(self):
+        with mock.patch.object(EventListCreateView, "aget_hit") as aget_hit:
+            response = await self.async_client.get("/api/events/")
+        aget_hit.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+
+    def test_views_are_sync_when_disabled(self):
+        self.assertTrue(asyncio.iscoroutinefunction(EventListCreateView.as_view()))
+        with override_settings(ASYNC_CACHE_HITS=False):
+            view = EventListCreateView.as_view()
+        self.assertFalse(asyncio.iscoroutinefunction(view))
+
+    def test_wsgi_requests_use_the_sync_views(self):
+        with mock.patch.object(EventListCreateView, "aget_hit") as aget_hit:
+            response = self.client.get("/api/events/")
+        aget_hit.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+
+    async def test_graphql_hits(self):
+        body = {"query": "{ allEvents { edges { node { name } } } }"}
+        post = lambda: self.async_client.post(
+            "/api/graphql/", body, content_type="application/json"
+        )
+        first = (await post()).json()
+        with mock.patch(
+            "core.graphql.documents.execute", wraps=graphql.execute
+        ) as execute:
+            second = (await post()).json()
+        execute.assert_not_called()
+        self.assertEqual(second, first)
+        self.assertIn("cost", second["extensions"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EventConditionalGetTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.event = create_event()
+
+    def assertNotModified(self, url, **headers):
+        with self.assertNumQueries(0):
+            response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+    def test_list_etag_and_last_modified(self):
+        response = self.client.get("/api/events/")
+        self.assertIn("Last-Modified", response)
+        self.assertNotModified("/api/events/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertNotModified(
+            "/api/events/", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+
+        create_event(name="DjangoCon")
+        changed = self.client.get("/api/events/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], response["ETag"])
+
+    def test_detail_etag_follows_updated_at(self):
+        url = f"/api/events/{self.event.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.event.name = "PyCon BR"
+        self.event.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "PyCon BR")
+        self.assertNotModified(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    def test_detail_etag_differs_per_format(self):
+        url = f"/api/events/{self.event.pk}/"
+        etag = self.client.get(url)["ETag"]
+        html = self.client.get(url, HTTP_ACCEPT="text/html")
+        self.assertTrue(html["Content-Type"].startswith("text/html"))
+        self.assertNotEqual(html["ETag"], etag)
+        response = self.client.get(
+            url, HTTP_ACCEPT="text/html", HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_cold_detail_validator_is_filled_on_first_read(self):
+        cache.clear()
+        url = f"/api/events/{self.event.pk}/"
+        self.assertIn("ETag", self.client.get(url))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EventPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        start = timezone.now()
+        # Shared start dates force the id tie-breaker to be used
+        self.events = [
+            create_event(name=f"Event {i}", start_date=start + timedelta(days=i // 2))
+            for i in range(7)
+        ]
+
+    def walk(self, url):
+        names, pages = [], []
+        while url:
+            body = self.client.get(url).json()
+            names += [event["name"] for event in body["results"]]
+            pages.append(body)
+            url = body["next"]
+        return names, pages
+
+    def test_pages_cover_every_event_once_in_order(self):
+        names, pages = self.walk("/api/events/?page_size=3")
+        expected = [
+            event.name
+            for event in sorted(self.events, key=lambda e: (e.start_date, e.id))
+        ]
+        self.assertEqual(names, expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]["previous"])
+
+    def test_previous_link_returns_the_prior_page(self):
+        _, pages = self.walk("/api/events/?page_size=3")
+        previous = self.client.get(pages[1]["previous"]).json()
+        self.assertEqual(previous["results"], pages[0]["results"])
+
+    def test_each_page_is_cached_under_its_own_key(self):
+        _, pages = self.walk("/api/events/?page_size=3")
+        with self.assertNumQueries(0):
+            _, cached = self.walk("/api/events/?page_size=3")
+        self.assertEqual(cached, pages)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/events/?cursor=bogus")
+        self.assertEqual(response.status_code, 404)
+        for payload in (
+            b'{"p": ["soon", "x"], "r": false}',
+            b'{"p": {"a": 1, "b": 2}, "r": false}',
+            b'["p", "r"]',
+        ):
+            cursor = base64.urlsafe_b64encode(payload).decode()
+            response = self.client.get(f"/api/events/?cursor={cursor}")
+            self.assertEqual(response.status_code, 404)
+
+
+class EventQueryPlanTests(TestCase):
+    """Hot lookups must keep hitting their index"""
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # Tiny test tables would otherwise always be sequentially scanned.
+            # SET LOCAL ends with the test's transaction.
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        self.now = timezone.now()
+
+    def assertUsesIndex(self, queryset, index):
+        plan = queryset.explain()
+        self.assertIn(index, plan)
+        self.assertNotIn("TEMP B-TREE", plan)  # SQLite sorting in memory
+
+    def test_event_by_name(self):
+        self.assertUsesIndex(Event.objects.filter(name="PyCon"), "event_name_idx")
+
+    def test_date_range(self):
+        events = Event.objects.filter(
+            start_date__gte=self.now, end_date__lt=self.now + timedelta(days=7)
+        )
+        self.assertUsesIndex(events, "event_start_end_date_idx")
+
+    def test_upcoming_page(self):
+        events = Event.objects.filter(start_date__gte=self.now).order_by(
+            "start_date", "id"
+        )
+        self.assertUsesIndex(events[:51], "event_start_date_id_idx")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EventExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        create_event(name="PyCon", segment="Python")
+        create_event(name="JSConf", segment="JavaScript")
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        body = self.export("/api/events/export.ndjson")
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual([row["name"] for row in rows], ["PyCon", "JSConf"])
+        self.assertIn("start_date", rows[0])
+
+    def test_csv_uses_list_filters(self):
+        body = self.export("/api/events/export.csv?segment=Python")
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual([row["name"] for row in rows], ["PyCon"])
+
+    def test_invalid_filter_and_format(self):
+        url = "/api/events/export.csv?starts_after=someday"
+        self.assertEqual(self.client.get(url).status_code, 400)
+        self.assertEqual(self.client.get("/api/events/export.xml").status_code, 404)
+
+    def test_impossible_dates_are_rejected(self):
+        for path in ("/api/events/", "/api/events/export.csv"):
+            for value in ("2024-02-30", "2024-01-01T25:00"):
+                response = self.client.get(path, {"starts_after": value})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("starts_after", response.json())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EventBulkTests(TransactionTestCase):
+    url = "/api/events/bulk/"
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def payload(self, count, **kwargs):
+        return [
+            {
+                "name": f"Event {i}",
+                "description": "Bulk",
+                "start_date": "2030-01-01T10:00:00Z",
+                "end_date": "2030-01-02T10:00:00Z",
+                **kwargs,
+            }
+            for i in range(count)
+        ]
+
+    def test_create_writes_once_and_invalidates_once(self):
+        self.assertEqual(len(self.client.get("/api/events/").json()["results"]), 0)
+        with mock.patch(
+            "core.cache.invalidation.invalidate_tags", wraps=invalidate_tags
+        ) as invalidate:
+            response = self.client.post(self.url, self.payload(3), format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Event.objects.count(), 3)
+        invalidate.assert_called_once()
+        self.assertEqual(invalidate.call_args.args[0][0], "event.event")
+        self.assertEqual(len(self.client.get("/api/events/").json()["results"]), 3)
+
+    def test_invalid_item_rejects_the_whole_batch(self):
+        payload = self.payload(2)
+        payload[1]["start_date"] = "someday"
+        response = self.client.post(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()[0], {})
+        self.assertFalse(Event.objects.exists())
+
+    def test_update(self):
+        events = [create_event(name=f"Event {i}") for i in range(2)]
+        detail = f"/api/events/{events[0].pk}/"
+        self.client.get(detail)
+        payload = [{"id": str(event.pk), "location": "Lisboa"} for event in events]
+        with self.assertNumQueries(4):  # select, then one UPDATE in a savepoint
+            response = self.client.patch(self.url, payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(Event.objects.values_list("location", flat=True)), {"Lisboa"}
+        )
+        events[0].refresh_from_db()
+        self.assertEqual(self.client.get(detail).json()["location"], "Lisboa")
+        self.assertGreater(events[0].updated_at, events[0].created_at)
+
+        payload = [{"id": "00000000-0000-0000-0000-000000000000", "name": "x"}]
+        response = self.client.patch(self.url, payload, format="json")
+        self.assertEqual(response.json(), [{"id": ["Not found."]}])
+
+    def test_delete_folds_cascaded_signals(self):
+        events = [create_event(name=f"Event {i}") for i in range(3)]
+        Link.objects.create(event=events[0], type="instagram", link="https://a.io")
+        ids = [str(event.pk) for event in events[:2]] + ["not-a-uuid"]
+        with mock.patch(
+            "core.cache.invalidation.invalidate_instances"
+        ) as invalidate:
+            response = self.client.delete(self.url, {"ids": ids}, format="json")
+        self.assertEqual(response.json(), {"deleted": 2})
+        self.assertEqual(Event.objects.count(), 1)
+        models = sorted(call.args[0].__name__ for call in invalidate.call_args_list)
+        self.assertEqual(models, ["Event", "Link"])
+
+    def test_graphql_bulk_create(self):
+        mutation = """
+            mutation ($events: [EventInput!]!) {
+              bulkCreateEvents(events: $events) { events { name location } }
+            }
+        """
+        events = [
+            {
+                "name": "PyCon",
+                "description": "Python",
+                "startDate": "2030-01-01T10:00:00+00:00",
+                "endDate": "2030-01-02T10:00:00+00:00",
+            }
+        ]
+        body = {"query": mutation, "variables": {"events": events}}
+        response = self.client.post("/api/graphql/", body, format="json").json()
+        created = response["data"]["bulkCreateEvents"]["events"]
+        self.assertEqual(created, [{"name": "PyCon", "location": "Brasil"}])
+        self.assertTrue(Event.objects.filter(name="PyCon").exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CommitAwareInvalidationTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.events = [create_event(name=f"Event {i}") for i in range(3)]
+
+    def test_invalidation_waits_for_the_commit(self):
+        event = self.events[0]
+        url = f"/api/events/{event.pk}/"
+        self.client.get(url)
+        with transaction.atomic():
+            event.name = "Renamed"
+            event.save()
+            self.assertIsNotNone(cache.get(detail_cache_key("event", event.pk)))
+        self.assertIsNone(cache.get(detail_cache_key("event", event.pk)))
+        self.assertEqual(self.client.get(url).json()["name"], "Renamed")
+
+    def test_writes_in_a_transaction_are_flushed_once(self):
+        removed = self.events[2].pk
+        with mock.patch("core.cache.invalidation.invalidate_instances") as invalidate:
+            with transaction.atomic():
+                for _ in range(2):
+                    for event in self.events:
+                        event.save()
+                self.events[2].delete()
+        invalidate.assert_called_once()
+        model, saved, deleted, _ = invalidate.call_args.args
+        self.assertEqual(model, Event)
+        pks = [event.pk for event in saved]
+        self.assertCountEqual(pks, [self.events[0].pk, self.events[1].pk])
+        self.assertEqual([event.pk for event in deleted], [removed])
+
+    def test_rolled_back_writes_are_not_flushed(self):
+        with mock.patch("core.cache.invalidation.invalidate_instances") as invalidate:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.events[0].save()
+                raise RuntimeError
+            invalidate.assert_not_called()
+            with transaction.atomic():
+                self.events[1].save()
+        invalidate.assert_called_once()
+        _, saved, _, _ = invalidate.call_args.args
+        self.assertEqual([event.pk for event in saved], [self.events[1].pk])
+
+    def test_rolled_back_savepoints_are_not_flushed(self):
+        with mock.patch("core.cache.invalidation.invalidate_instances") as invalidate:
+            with transaction.atomic():
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    self.events[0].save()
+                    raise RuntimeError
+                self.events[1].save()
+        invalidate.assert_called_once()
+        _, saved, _, _ = invalidate.call_args.args
+        self.assertEqual([event.pk for event in saved], [self.events[1].pk])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EventGraphQLBatchingTests(TransactionTestCase):
+    query = """
+        query Links {
+          allEvents { edges { node { name relatedLinks { link event { name } } } } }
+        }
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def create_events(self, count):
+        for i in range(count):
+            event = create_event(name=f"Event {i}")
+            Link.objects.create(event=event, type="instagram", link="https://a.io")
+            Link.objects.create(event=event, type="linkedin", link="https://b.io")
+
+    def count_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/graphql/", {"query": self.query}, format="json"
+            )
+        self.assertNotIn("errors", response.json())
+        return len(queries), nodes(response.json()["data"]["allEvents"])
+
+    def test_cached_result_is_evicted_by_writes(self):
+        self.create_events(1)
+        query = {"query": "{ allEvents { edges { node { relatedLinks { link } } } } }"}
+        post = lambda: self.client.post("/api/graphql/", query, format="json").json()
+        self.assertEqual(len(nodes(post()["data"]["allEvents"])), 1)
+        with self.assertNumQueries(0):
+            post()
+
+        self.client.post(
+            "/api/events/",
+            {
+                "name": "DjangoCon",
+                "description": "Django conference",
+                "start_date": "2030-01-01T10:00:00Z",
+                "end_date": "2030-01-02T10:00:00Z",
+            },
+            format="json",
+        )
+        self.assertEqual(len(nodes(post()["data"]["allEvents"])), 2)
+
+        event = Event.objects.get(name="DjangoCon")
+        Link.objects.create(event=event, type="linkedin", link="https://c.io")
+        events = nodes(post()["data"]["allEvents"])
+        links = [event["relatedLinks"] for event in events]
+        self.assertEqual(sum(map(len, links)), 3)
+
+    def test_hit_skips_execution_and_errors_are_not_cached(self):
+        self.create_events(1)
+        post = lambda query: self.client.post(
+            "/api/graphql/", {"query": query}, format="json"
+        ).json()
+        with mock.patch(
+            "core.graphql.documents.execute", wraps=graphql.execute
+        ) as execute:
+            first = post("{ allEvents { edges { node { name } } } }")
+            self.assertEqual(post("{ allEvents { edges { node { name } } } }"), first)
+            self.assertEqual(execute.call_count, 1)
+
+            post('{ eventByName(name: "missing") { name } }')
+            post('{ eventByName(name: "missing") { name } }')
+            self.assertEqual(execute.call_count, 3)
+
+    def test_query_count_is_constant(self):
+        self.create_events(2)
+        few, events = self.count_queries()
+        self.assertEqual(len(events[0]["relatedLinks"]), 2)
+        self.assertEqual(events[0]["relatedLinks"][0]["event"]["name"], "Event 0")
+
+        self.create_events(8)
+        many, events = self.count_queries()
+        self.assertEqual(len(events), 10)
+        self.assertEqual(few, many)
+        self.assertEqual(many, 2)  # events, then one IN query for links
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EventGraphQLSelectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        event = create_event(name="PyCon")
+        Link.objects.create(event=event, type="instagram", link="https://a.io")
+
+    def run_query(self, query):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                "/api/graphql/", {"query": query}, format="json"
+            )
+        self.assertNotIn("errors", response.json())
+        return [query["sql"] for query in queries], response.json()["data"]
+
+    def test_only_requested_columns_are_loaded(self):
+        sql, data = self.run_query("{ allEvents { edges { node { name } } } }")
+        self.assertEqual(nodes(data["allEvents"]), [{"name": "PyCon"}])
+        self.assertEqual(len(sql), 1)
+        self.assertIn('"event_event"."name"', sql[0])
+        self.assertNotIn('"event_event"."description"', sql[0])
+
+    def test_relations_are_prefetched_and_joined(self):
+        sql, data = self.run_query(
+            """{ eventByName(name: "PyCon") {
+                   ... on EventType { relatedLinks { link event { location } } }
+               } }"""
+        )
+        links = data["eventByName"]["relatedLinks"]
+        expected = [{"link": "https://a.io", "event": {"location": "Brasil"}}]
+        self.assertEqual(links, expected)
+        self.assertEqual(len(sql), 2)
+        self.assertIn("JOIN", sql[1])
+        self.assertNotIn('"event_link"."type"', sql[1])
+
+    def test_repeated_fields_are_planned_together(self):
+        create_event(name="DjangoCon")
+        sql, data = self.run_query(
+            """{ eventByName(name: "PyCon") { name }
+                 eventByName(name: "PyCon") { description relatedLinks { link } }
+                 allEvents { edges { node { name } } }
+                 allEvents { edges { node { relatedLinks { type } } } }
+                 allEvents { edges { node { relatedLinks { link } } } } }"""
+        )
+        self.assertEqual(data["eventByName"]["description"], "Python conference")
+        links = data["eventByName"]["relatedLinks"]
+        self.assertEqual(links, [{"link": "https://a.io"}])
+        expected = [{"type": "INSTAGRAM", "link": "https://a.io"}]
+        self.assertEqual(nodes(data["allEvents"])[0]["relatedLinks"], expected)
+        self.assertEqual(len(sql), 4)  # each root field: the rows, then the links
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EventConnectionTests(TestCase):
+    query = """
+        query Page($first: Int, $after: String, $last: Int, $before: String,
+                   $segment: String, $startsAfter: DateTime) {
+          allEvents(first: $first, after: $after, last: $last, before: $before,
+                    segment: $segment, startsAfter: $startsAfter) {
+            edges { cursor node { name } }
+            pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+          }
+        }
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        start = timezone.now()
+        for i in range(5):
+            segment = "tech" if i % 2 else "music"
+            create_event(
+                name=f"Event {i}", segment=segment, start_date=start + timedelta(i)
+            )
+
+    def page(self, **variables):
+        body = {"query": self.query, "variables": variables}
+        response = self.client.post("/api/graphql/", body, format="json").json()
+        return response if "errors" in response else response["data"]["allEvents"]
+
+    def names(self, page):
+        return [node["name"] for node in nodes(page)]
+
+    def test_forward_and_backward_pages(self):
+        first = self.page(first=2)
+        self.assertEqual(self.names(first), ["Event 0", "Event 1"])
+        self.assertTrue(first["pageInfo"]["hasNextPage"])
+        self.assertFalse(first["pageInfo"]["hasPreviousPage"])
+
+        after = first["pageInfo"]["endCursor"]
+        second = self.page(first=2, after=after)
+        self.assertEqual(self.names(second), ["Event 2", "Event 3"])
+        self.assertTrue(second["pageInfo"]["hasPreviousPage"])
+
+        before = second["pageInfo"]["startCursor"]
+        back = self.page(last=1, before=before)
+        self.assertEqual(self.names(back), ["Event 1"])
+        self.assertTrue(back["pageInfo"]["hasPreviousPage"])
+        self.assertEqual(self.names(self.page(last=2)), ["Event 3", "Event 4"])
+
+    def test_both_cursors_bound_the_page(self):
+        cursors = [edge["cursor"] for edge in self.page(first=5)["edges"]]
+        page = self.page(first=10, before=cursors[3])
+        self.assertEqual(self.names(page), ["Event 0", "Event 1", "Event 2"])
+        page = self.page(last=10, after=cursors[1])
+        self.assertEqual(self.names(page), ["Event 2", "Event 3", "Event 4"])
+        page = self.page(first=1, after=cursors[0], before=cursors[3])
+        self.assertEqual(self.names(page), ["Event 1"])
+        self.assertTrue(page["pageInfo"]["hasNextPage"])
+        page = self.page(last=5, after=cursors[0], before=cursors[3])
+        self.assertEqual(self.names(page), ["Event 1", "Event 2"])
+        self.assertFalse(page["pageInfo"]["hasPreviousPage"])
+        response = self.page(first=1, before="nope")
+        self.assertEqual(response["errors"][0]["message"], "Invalid cursor")
+
+    def test_filters(self):
+        page = self.page(segment="tech")
+        self.assertEqual(self.names(page), ["Event 1", "Event 3"])
+        starts_after = (timezone.now() + timedelta(days=3, hours=1)).isoformat()
+        self.assertEqual(self.names(self.page(startsAfter=starts_after)), ["Event 4"])
+
+    def test_each_page_is_cached_and_bounded(self):
+        with self.assertNumQueries(1):
+            self.page(first=2)
+        with self.assertNumQueries(0):
+            self.page(first=2)
+        with self.assertNumQueries(1):
+            self.page(first=3)
+
+    def test_invalid_arguments(self):
+        response = self.page(after="nope")
+        self.assertEqual(response["errors"][0]["message"], "Invalid cursor")
+        cursor = base64.urlsafe_b64encode(b'{"p": {"a": 1, "b": 2}, "r": false}')
+        response = self.page(after=cursor.decode())
+        self.assertEqual(response["errors"][0]["message"], "Invalid cursor")
+        response = self.page(first=1, last=1)
+        self.assertIn("either first or last", response["errors"][0]["message"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class DocumentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.documents = CachedGraphQLView.document_cache
+        self.documents.clear()
+        self.addCleanup(self.documents.clear)
+
+    def post(self, query):
+        return self.client.post("/api/graphql/", {"query": query}, format="json")
+
+    def test_documents_are_parsed_once(self):
+        with mock.patch("core.graphql.documents.parse", wraps=graphql.parse) as parse:
+            for name in ["a", "b", "a"]:
+                self.post(f'{{ eventByName(name: "{name}") {{ name }} }}')
+        self.assertEqual(parse.call_count, 2)
+        self.assertEqual(self.documents.info().hits, 1)
+        self.assertEqual(self.documents.info().misses, 2)
+
+    def test_invalid_documents_are_not_kept(self):
+        self.assertEqual(self.post("{ nope }").status_code, 400)
+        self.assertEqual(self.documents.info().currsize, 0)
+
+    def test_lru_is_bounded(self):
+        documents = DocumentCache(max_size=2)
+        for key in ["a", "b", "a", "c"]:
+            documents.set(key, key)
+        self.assertIsNone(documents.get("b"))
+        self.assertEqual(documents.get("a"), "a")
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryCostTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        CachedGraphQLView.document_cache.clear()
+        self.client = APIClient()
+
+    variable_page_query = """
+        query ($n: Int = 5) { allEvents(first: $n) { edges { node { name } } } }
+    """
+
+    def post(self, query, **variables):
+        body = {"query": query, "variables": variables}
+        return self.client.post("/api/graphql/", body, format="json")
+
+    def test_cost_is_reported_in_extensions(self):
+        query = "{ allEvents { edges { node { name relatedLinks { link } } } } }"
+        response = self.post(query)
+        self.assertEqual(response.status_code, 200)
+        cost = response.json()["extensions"]["cost"]
+        # allEvents + 100 x (edges + node + relatedLinks + 10 x link (0))
+        self.assertEqual(cost["requested"], 1 + 100 * 3)
+        self.assertEqual(cost["depth"], 5)
+        response = self.post(
+            "query ($n: Int) { allEvents(first: $n) { edges { node { name } } } }",
+            n=5,
+        )
+        self.assertEqual(response.json()["extensions"]["cost"]["requested"], 1 + 5 * 2)
+
+    @override_settings(GRAPHQL_COST={"MAX_COST": 50})
+    def test_operations_over_budget_are_rejected(self):
+        response = self.post(
+            "{ allEvents { edges { node { relatedLinks { event { name } } } } } }"
+        )
+        self.assertEqual(response.status_code, 400)
+        error = response.json()["errors"][0]
+        self.assertEqual(error["extensions"]["code"], "QUERY_TOO_COSTLY")
+        query = "{ allEvents(first: 10) { edges { node { name } } } }"
+        self.assertEqual(self.post(query).status_code, 200)
+
+    def test_variable_page_sizes_are_checked_against_the_budget(self):
+        query = self.variable_page_query
+        self.assertEqual(self.post(query, n=500).status_code, 200)  # now cached
+        with override_settings(GRAPHQL_COST={"MAX_COST": 50}):
+            self.assertEqual(self.post(query, n=5).status_code, 200)
+            response = self.post(query, n=500)
+            self.assertEqual(response.status_code, 400)
+            error = response.json()["errors"][0]
+            self.assertEqual(error["extensions"]["code"], "QUERY_TOO_COSTLY")
+            self.assertEqual(error["extensions"]["cost"], 1 + 500 * 2)
+
+    def test_malformed_variables_are_reported(self):
+        for variables in ([1], "n", 5):
+            body = {"query": self.variable_page_query, "variables": variables}
+            response = self.client.post("/api/graphql/", body, format="json")
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("errors", response.json())
+
+    @override_settings(ASYNC_CACHE_HITS=True, ROOT_URLCONF=ASYNC_HIT_URLS)
+    async def test_cached_results_over_budget_are_not_served(self):
+        query = self.variable_page_query
+        body = {"query": query, "variables": {"n": 500}}
+        post = lambda: self.async_client.post(
+            "/api/graphql/", body, content_type="application/json"
+        )
+        self.assertEqual((await post()).status_code, 200)
+        with override_settings(GRAPHQL_COST={"MAX_COST": 50}):
+            self.assertEqual((await post()).status_code, 400)
+
+    @override_settings(GRAPHQL_COST={"MAX_DEPTH": 5})
+    def test_depth_limit_follows_fragments(self):
+        query = """
+            { allEvents { edges { node { ...E } } } }
+            fragment E on EventType { relatedLinks { event { name } } }
+        """
+        response = self.post(query)
+        self.assertEqual(response.status_code, 400)
+        error = response.json()["errors"][0]
+        self.assertEqual(error["extensions"]["code"], "QUERY_TOO_DEEP")
+
+    def test_introspection_is_free(self):
+        response = self.post(graphql.get_introspection_query())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["extensions"]["cost"]["requested"], 0)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PersistedQueryTests(TestCase):
+    query = "{ allEvents { edges { node { name } } } }"
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        create_event()
+        self.extensions = {
+            "persistedQuery": {
+                "version": 1,
+                "sha256Hash": hashlib.sha256(self.query.encode()).hexdigest(),
+            }
+        }
+
+    def get(self):
+        params = {"extensions": json.dumps(self.extensions)}
+        return self.client.get("/api/graphql/", params, HTTP_ACCEPT="application/json")
+
+    def test_unknown_hash_then_registration(self):
+        body = self.client.post(
+            "/api/graphql/", {"extensions": self.extensions}, format="json"
+        ).json()
+        self.assertEqual(body["errors"][0]["message"], "PersistedQueryNotFound")
+
+        body = self.client.post(
+            "/api/graphql/",
+            {"query": self.query, "extensions": self.extensions},
+            format="json",
+        ).json()
+        self.assertEqual(nodes(body["data"]["allEvents"]), [{"name": "PyCon"}])
+
+        response = self.get()
+        self.assertEqual(response.json(), body)
+        self.assertIn("public", response["Cache-Control"])
+        self.assertNotIn("csrftoken", response.cookies)
+
+    def test_unknown_hash_over_get_is_not_cacheable(self):
+        response = self.get()
+        self.assertNotIn("Cache-Control", response)
+
+    def test_hash_mismatch(self):
+        response = self.client.post(
+            "/api/graphql/",
+            {"query": "{ event(id: 1) { id } }", "extensions": self.extensions},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_string_queries_are_rejected(self):
+        for query in (123, [self.query], {"query": self.query}):
+            for extensions in ({}, {"extensions": self.extensions}):
+                response = self.client.post(
+                    "/api/graphql/", {"query": query, **extensions}, format="json"
+                )
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "core.cache.backends.InstrumentedLocMemCache"}
+    }
+)
+class MetricsTests(TestCase):
+    endpoint = "api/events/<uuid:pk>/"
+
+    def setUp(self):
+        cache.clear()
+        registry.clear()
+        self.addCleanup(registry.clear)
+        self.url = f"/api/events/{create_event().pk}/"
+
+    def test_requests_record_cache_and_db_usage(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertEqual(HTTP_REQUESTS.value(self.endpoint, "GET", "200"), 2)
+        self.assertEqual(CACHE_LOOKUPS.value("event_detail", "shared", "miss"), 1)
+        self.assertEqual(CACHE_LOOKUPS.value("event_detail", "shared", "hit"), 1)
+        queries, requests = HTTP_REQUEST_DB_QUERIES.value(self.endpoint)
+        self.assertEqual(requests, 2)
+        self.assertGreater(queries, 0)
+        self.assertGreater(HTTP_REQUEST_CACHE_SECONDS.value(self.endpoint)[0], 0)
+
+    async def test_async_hits_are_recorded(self):
+        await self.async_client.get(self.url)
+        await self.async_client.get(self.url)
+        self.assertEqual(CACHE_LOOKUPS.value("event_detail", "shared", "hit"), 1)
+        self.assertEqual(HTTP_REQUEST_DB_QUERIES.value(self.endpoint)[1], 2)
+
+    def test_metrics_endpoint(self):
+        self.client.get(self.url)
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        body = response.content.decode()
+        self.assertIn(
+            'cache_lookups_total{namespace="event_detail",layer="shared",'
+            'result="miss"} 1',
+            body,
+        )
+        size = f'http_response_size_bytes_count{{endpoint="{self.endpoint}"}} 1'
+        self.assertIn(size, body)
+        self.assertIn("# TYPE graphql_document_cache_entries gauge", body)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_metrics_endpoint_can_be_disabled(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ListPartitionTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.music = create_event(name="Rock in Rio", segment="Music")
+        self.art = create_event(name="Bienal", segment="Art", location="Lisboa")
+        for url in self.urls.values():
+            self.client.get(url)
+
+    urls = {
+        "all": "/api/events/",
+        "music": "/api/events/?segment=Music",
+        "art": "/api/events/?segment=Art",
+        "lisboa": "/api/events/?location=Lisboa",
+    }
+
+    def names(self, key):
+        response = self.client.get(self.urls[key])
+        return [event["name"] for event in response.json()["results"]]
+
+    def assertCached(self, *keys):
+        for key in keys:
+            with self.assertNumQueries(0):
+                self.client.get(self.urls[key])
+
+    def test_writes_keep_lists_of_other_partitions(self):
+        self.art.name = "Bienal 2030"
+        self.art.save()
+        self.assertCached("music")
+        self.assertEqual(self.names("art"), ["Bienal 2030"])
+        self.assertEqual(self.names("lisboa"), ["Bienal 2030"])
+        self.assertIn("Bienal 2030", self.names("all"))
+
+        create_event(name="Sonar", segment="Music")
+        self.assertCached("art", "lisboa")
+        self.assertEqual(len(self.names("music")), 2)
+
+    def test_moving_a_row_invalidates_both_partitions(self):
+        event = Event.objects.get(pk=self.music.pk)
+        event.segment = "Art"
+        event.save()
+        self.assertCached("lisboa")
+        self.assertEqual(self.names("music"), [])
+        self.assertEqual(sorted(self.names("art")), ["Bienal", "Rock in Rio"])
+
+    def test_unknown_partition_invalidates_every_list(self):
+        event = Event.objects.only("name").get(pk=self.music.pk)
+        event.name = "Rock in Rio 2030"
+        event.save()
+        for key in self.urls:
+            with self.assertNumQueries(1):
+                self.client.get(self.urls[key])
+
+    def test_deletes_invalidate_the_partitions_of_the_row(self):
+        self.art.delete()
+        self.assertCached("music")
+        self.assertEqual(self.names("art"), [])
+        self.assertEqual(self.names("lisboa"), [])
+
+
+class InlineExecutor:
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class WarmCacheTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        clear_recorded()
+        self.client = APIClient()
+        self.upcoming = create_event(name="Rock in Rio", segment="Music")
+        past = timezone.now() - timedelta(days=10)
+        self.past = create_event(start_date=past, end_date=past + timedelta(days=1))
+
+    def warm(self, *args):
+        output = io.StringIO()
+        call_command("warm_cache", "--batch-size", "2", *args, stdout=output)
+        return json.loads(output.getvalue())
+
+    def assertCached(self, url, method="get", **kwargs):
+        with self.assertNumQueries(0):
+            response = getattr(self.client, method)(url, **kwargs)
+        self.assertEqual(response.status_code, 200)
+
+    def test_warms_lists_partitions_and_upcoming_details(self):
+        report = self.warm()
+        self.assertEqual(report["failed"], 0)
+        self.assertCached("/api/events/")
+        self.assertCached("/api/events/?segment=Music")
+        self.assertCached("/api/events/?location=Brasil")
+        self.assertCached(f"/api/events/{self.upcoming.pk}/")
+        self.assertIsNone(cache.get(detail_cache_key("event", self.past.pk)))
+
+    def test_view_errors_count_as_failed(self):
+        with mock.patch.object(
+            EventDetailView, "retrieve", side_effect=RuntimeError
+        ), self.assertLogs("django.request", "ERROR"):
+            report = self.warm("--partitions", "0")
+        self.assertEqual(report["requests"], 2)
+        self.assertEqual(report["failed"], 1)
+        self.assertCached("/api/events/")
+
+    def test_warms_configured_graphql_queries(self):
+        body = {"query": "{ allEvents(first: 5) { edges { node { name } } } }"}
+        with override_settings(WARM_CACHE={"QUERIES": [body]}):
+            self.warm("--details", "0", "--partitions", "0")
+        self.assertCached("/api/graphql/", "post", data=body, format="json")
+
+    @override_settings(WARM_CACHE={"RECORD": True, "SAMPLE_RATE": 1})
+    def test_replays_the_hottest_recorded_requests(self):
+        url = f"/api/events/{self.past.pk}/"
+        self.client.get(url)
+        self.client.get(url)
+        self.client.get("/api/events/?segment=Music")
+        self.client.get("/api/events/", HTTP_X_CACHE_WARM="1")
+        self.assertEqual(
+            [request["path"] for request in top_requests(5)],
+            [url, "/api/events/?segment=Music"],
+        )
+
+        cache.clear()
+        self.warm("--details", "0", "--partitions", "0", "--recorded", "1")
+        self.assertCached(url)
+        self.assertIsNone(cache.get(detail_cache_key("event", self.upcoming.pk)))
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CACHE_REFRESH_ON_WRITE={"ENABLED": True})
+class RefreshOnWriteTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.event = create_event()
+        self.url = f"/api/events/{self.event.pk}/"
+        self.etag = self.client.get(self.url)["ETag"]
+        patcher = mock.patch("core.cache.refresh._executor", InlineExecutor())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_write_refreshes_the_detail_entry(self):
+        self.client.patch(self.url, {"name": "PyCon BR"}, format="json")
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()["name"], "PyCon BR")
+        self.assertNotEqual(response["ETag"], self.etag)
+
+    def test_refresh_waits_for_the_lock_and_reads_the_row_under_it(self):
+        key = detail_cache_key("event", self.event.pk)
+        cache.add(lock_key(key), "reader")  # e.g. a miss computing the old row
+
+        def release(seconds):
+            self.assertEqual(cache.get(key).load()["name"], "PyCon")
+            self.assertEqual(self.client.get(self.url)["ETag"], self.etag)
+            cache.delete(lock_key(key))
+
+        with mock.patch("core.cache.stampede.time.sleep", side_effect=release):
+            self.client.patch(self.url, {"name": "PyCon BR"}, format="json")
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()["name"], "PyCon BR")
+        self.assertNotEqual(response["ETag"], self.etag)
+
+    def test_rows_deleted_before_the_refresh_are_evicted(self):
+        self.assertIsNotNone(cache.get(modified_key("event", self.event.pk)))
+        Event.objects.filter(pk=self.event.pk)._raw_delete("default")  # no signals
+        EventDetailView.refresh_details([self.event.pk])
+        self.assertIsNone(cache.get(detail_cache_key("event", self.event.pk)))
+        self.assertIsNone(cache.get(modified_key("event", self.event.pk)))
+
+    def test_failed_refresh_evicts_the_entry(self):
+        with mock.patch.object(
+            EventDetailView, "refresh_details", side_effect=RuntimeError
+        ), self.assertLogs("core.cache.refresh", "ERROR"):
+            self.client.patch(self.url, {"name": "PyCon BR"}, format="json")
+        self.assertIsNone(cache.get(detail_cache_key("event", self.event.pk)))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=self.etag)
+        self.assertEqual(response.json()["name"], "PyCon BR")
+
+    def test_deletes_still_evict(self):
+        self.client.delete(self.url)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
@@ -1,13 +1,24 @@
 from django.urls import path
-from .views import EventListCreateView, EventDetailView
+from .views import (
+    EventBulkView,
+    EventDetailView,
+    EventExportView,
+    EventListCreateView,
+)
 from django.views.decorators.csrf import csrf_exempt
 
 
 from django.urls import path
-from graphene_django.views import GraphQLView
+from core.graphql.views import PersistedQueryGraphQLView
 
 urlpatterns = [
     path("events/", EventListCreateView.as_view(), name="event-list-create"),
+    path("events/bulk/", EventBulkView.as_view(), name="event-bulk"),
     path("events/<uuid:pk>/", EventDetailView.as_view(), name="event-detail"),
-    path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=True))),
+    path("events/export.<str:fmt>", EventExportView.as_view(), name="event-export"),
+    path(
+        "graphql/",
+        csrf_exempt(PersistedQueryGraphQLView.as_view(graphiql=True)),
+        name="graphql",
+    ),
 ]
@@ -1,7 +1,19 @@
-from rest_framework import generics
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from rest_framework import generics, status
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .filters import filter_events
 from .models import Event
 from .serializers import EventSerializer
 
+from core.cache.aio import AsyncHitMixin
+from core.cache.invalidation import invalidation_batch
+from core.pagination import KeysetPagination
+from core.serializers import parse_pks
+from core.streaming import stream_csv, stream_ndjson
+from core.cache.conditional import ConditionalDetailMixin, ConditionalListMixin
 from core.cache.views import CachedListCreateView, CachedRetrieveUpdateDestroyView
 from core.cache.mixins import (
     CacheDetailMixin,
@@ -9,11 +21,103 @@ from core.cache.mixins import (
 )
 
 
-class EventListCreateView(CacheListMixin, generics.ListCreateAPIView):
+class EventListCreateView(
+    AsyncHitMixin, ConditionalListMixin, CacheListMixin, generics.ListCreateAPIView
+):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
+    pagination_class = KeysetPagination
+    cache_rendered = True
+    cache_partition_params = ("segment", "location")
 
+    def get_queryset(self):
+        return filter_events(super().get_queryset(), self.request.query_params)
 
-class EventDetailView(CacheDetailMixin, generics.RetrieveUpdateDestroyAPIView):
+
+class EventDetailView(
+    AsyncHitMixin,
+    ConditionalDetailMixin,
+    CacheDetailMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     queryset = Event.objects.all()
     serializer_class = EventSerializer
+    cache_local = True
+    cache_refresh_on_write = True
+
+
+class EventBulkView(APIView):
+    """Creates (POST), updates (PATCH) or deletes (DELETE) many events at once
+
+    Every item is validated before anything is written, the write is one
+    transaction, and caches are invalidated once per request.
+    """
+
+    serializer_class = EventSerializer
+    max_batch_size = 1000
+
+    def get_serializer(self, *args, **kwargs):
+        return self.serializer_class(
+            *args, many=True, max_length=self.max_batch_size, **kwargs
+        )
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def patch(self, request):
+        items = request.data if isinstance(request.data, list) else []
+        pks = parse_pks(
+            Event, [item.get("id") for item in items if isinstance(item, dict)]
+        )
+        events = list(Event.objects.filter(pk__in=pks))
+        serializer = self.get_serializer(events, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    def delete(self, request):
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or len(ids) > self.max_batch_size:
+            raise ValidationError(
+                {"ids": [f"Expected a list of at most {self.max_batch_size} ids."]}
+            )
+        # Deletes cascade and send post_delete per row, the batch folds them
+        with invalidation_batch(), transaction.atomic():
+            _, deleted = Event.objects.filter(pk__in=parse_pks(Event, ids)).delete()
+        return Response({"deleted": deleted.get(Event._meta.label, 0)})
+
+
+class EventExportView(APIView):
+    """Streams every event matching the list filters as NDJSON or CSV
+
+    Rows come from a server-side cursor through ``values_list``, so memory
+    stays constant whatever the table size.
+    """
+
+    chunk_size = 2000
+    content_types = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+    writers = {"ndjson": stream_ndjson, "csv": stream_csv}
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body format comes from the URL, never from the Accept header
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, fmt):
+        if fmt not in self.content_types:
+            raise NotFound()
+
+        fields = [field.attname for field in Event._meta.concrete_fields]
+        rows = (
+            filter_events(Event.objects.all(), request.query_params)
+            .order_by("start_date", "id")
+            .values_list(*fields)
+            .iterator(chunk_size=self.chunk_size)
+        )
+        response = StreamingHttpResponse(
+            self.writers[fmt](fields, rows), content_type=self.content_types[fmt]
+        )
+        response["Content-Disposition"] = f'attachment; filename="events.{fmt}"'
+        return response